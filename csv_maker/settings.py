@@ -42,12 +42,14 @@ INSTALLED_APPS = [
     'bootstrap5',
     'crispy_forms',
     'crispy_bootstrap5',
+    'rest_framework',
     'rest_framework.authtoken',
 
     'datasets.apps.DatasetsConfig',
 ]
 
 MIDDLEWARE = [
+    'datasets.middleware.RequestLatencyMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -135,6 +137,35 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/"
 
+# Number of rows generated at once by CsvGenerator
+DATASET_CHUNK_SIZE = 64 * 1024
+# Number of rows generated at once for streaming csv responses
+DATASET_STREAM_CHUNK_SIZE = 4 * 1024
+# Size of the write buffer for generated dataset files (in bytes)
+DATASET_FILE_BUFFER_SIZE = 1024 * 1024
+# Number of processes, which generate shards of one dataset in parallel
+DATASET_GENERATION_PROCESSES = 1
+# Write chunks by code-generated functions, specialized for every schema
+DATASET_ROW_FUNCTIONS_ENABLED = True
+# Number of compiled row plans, kept in memory of every process
+ROW_PLAN_LOCAL_CACHE_SIZE = 256
+# Seconds to keep compiled row plans in django cache
+ROW_PLAN_CACHE_TIMEOUT = 24 * 60 * 60
+# Reuse files of seeded datasets with the same parameters
+DATASET_CACHE_ENABLED = True
+# Max total size of cached dataset files (in bytes)
+DATASET_CACHE_MAX_SIZE = 10 * 1024 ** 3
+# Number of threads of zstd compressor (0 - compress in the caller thread)
+DATASET_COMPRESSION_THREADS = 0
+# Min number of seconds between saves of generation progress
+DATASET_PROGRESS_INTERVAL = 1.0
+# Seconds without progress, after which running job is claimed again
+DATASET_JOB_STALE_TIMEOUT = 10 * 60
+# Measure time of every column and stage of generation and store it
+DATASET_PROFILING_ENABLED = False
+# Number of schemas and datasets on one page of their lists
+LIST_PAGE_SIZE = 50
+
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
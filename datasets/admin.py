@@ -1,14 +1,52 @@
 from django.contrib import admin
+from django.utils.html import format_html, format_html_join
 
 from .models import (
-    Schema, SchemaColumn, Dataset, IntegerColumnField, TextColumnField,
-    EmailColumnField, DateColumnField, FullNameColumnField
+    Schema, SchemaColumn, Dataset, DatasetJob, DatasetCacheEntry,
+    IntegerColumnField, TextColumnField, EmailColumnField, DateColumnField,
+    FullNameColumnField
 )
 
 
+@admin.register(Dataset)
+class DatasetAdmin(admin.ModelAdmin):
+    list_display = (
+        '__str__', 'file_format', 'num_rows', 'rows_per_second', 'created_at'
+    )
+    list_filter = ('status', 'file_format')
+    # __str__ of dataset includes name of its schema
+    list_select_related = ('schema',)
+    readonly_fields = ('profile_breakdown',)
+
+    @admin.display(description='Profile')
+    def profile_breakdown(self, obj: Dataset) -> str:
+        """
+        Render sections of generation profile as table,
+        the slowest section goes first.
+        """
+        if not obj.profile:
+            return '-'
+        return format_html(
+            '<table><tr><th>Section</th><th>Seconds</th><th>%</th></tr>'
+            '{}</table>',
+            format_html_join(
+                '', '<tr><td>{}</td><td>{}</td><td>{}</td></tr>',
+                (
+                    (
+                        section['name'],
+                        f'{section["seconds"]:.3f}',
+                        f'{section["percent"]:.1f}'
+                    )
+                    for section in obj.profile['sections']
+                )
+            )
+        )
+
+
 admin.site.register(Schema)
 admin.site.register(SchemaColumn)
-admin.site.register(Dataset)
+admin.site.register(DatasetJob)
+admin.site.register(DatasetCacheEntry)
 admin.site.register(IntegerColumnField)
 admin.site.register(TextColumnField)
 admin.site.register(EmailColumnField)
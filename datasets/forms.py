@@ -5,8 +5,13 @@ from django.forms import inlineformset_factory, BaseInlineFormSet
 from datasets.models import (
     Schema, SchemaColumn, DateColumnField, EmailColumnField,
     IntegerColumnField, TextColumnField, FullNameColumnField,
-    PhoneColumnField, CompanyColumnField, JobColumnField, DomainNameColumnField
+    PhoneColumnField, CompanyColumnField, JobColumnField,
+    DomainNameColumnField, Dataset
 )
+from datasets.services.compression import (
+    COMPRESSION_LEVELS, is_compression_available
+)
+from datasets.services.parquet_writer import is_parquet_available
 
 
 class SchemaForm(forms.ModelForm):
@@ -46,6 +51,9 @@ class SchemaColumnForm(forms.ModelForm):
             'name': forms.TextInput(attrs={'class': 'form-control', }),
             'field_type': forms.Select(attrs={'class': 'form-control'}),
             'order': forms.NumberInput(attrs={'class': 'form-control'}),
+            'cardinality': forms.NumberInput(
+                attrs={'class': 'form-control'}
+            ),
         }
 
     def __init__(self, *args, **kwargs):
@@ -55,6 +63,13 @@ class SchemaColumnForm(forms.ModelForm):
 
     def clean(self):
         cleaned_data = super(SchemaColumnForm, self).clean()
+        number_of_sentences = cleaned_data.get('number_of_sentences')
+        if cleaned_data.get('field_type') == SchemaColumn.TEXT and \
+                number_of_sentences is not None and number_of_sentences < 1:
+            raise ValidationError({
+                'number_of_sentences':
+                    'Ensure this value is greater than or equal to 1.'
+            })
         if self._is_empty_form(cleaned_data):
             cleaned_data[self.DELETE] = True
         elif not self._is_full_form(cleaned_data):
@@ -80,6 +95,8 @@ class SchemaColumnForm(forms.ModelForm):
             data.pop('upper_bound')
         if field_type != SchemaColumn.TEXT:
             data.pop('number_of_sentences')
+        if field_type not in SchemaColumn.POOLED_FIELD_TYPES:
+            data.pop('cardinality')
 
         return data
 
@@ -152,6 +169,28 @@ SchemaColumnFormSet = inlineformset_factory(
 
 class DatasetGeneratorForm(forms.Form):
     num_rows = forms.IntegerField(
+        min_value=1,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+    seed = forms.IntegerField(
+        required=False,
+        min_value=0,
+        max_value=2 ** 63 - 1,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+    file_format = forms.ChoiceField(
+        required=False,
+        choices=Dataset.FORMAT_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    compression = forms.ChoiceField(
+        required=False,
+        choices=Dataset.COMPRESSION_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    compression_level = forms.IntegerField(
+        required=False,
+        min_value=1,
         widget=forms.NumberInput(attrs={'class': 'form-control'})
     )
 
@@ -161,4 +200,29 @@ class DatasetGeneratorForm(forms.Form):
         if not cleaned_data.get('num_rows'):
             raise forms.ValidationError("Enter number of rows.")
 
+        file_format = cleaned_data.get('file_format') or Dataset.CSV
+        cleaned_data['file_format'] = file_format
+        if file_format == Dataset.PARQUET and not is_parquet_available():
+            raise forms.ValidationError(
+                "Parquet format isn't available on the server."
+            )
+
+        compression = cleaned_data.get('compression') or \
+            Dataset.NO_COMPRESSION
+        cleaned_data['compression'] = compression
+        # parquet is compressed by pyarrow itself
+        if file_format != Dataset.PARQUET and \
+                not is_compression_available(compression):
+            raise forms.ValidationError(
+                "This compression isn't available on the server."
+            )
+        level = cleaned_data.get('compression_level')
+        if level is not None and compression != Dataset.NO_COMPRESSION:
+            min_level, max_level, _ = COMPRESSION_LEVELS[compression]
+            if not min_level <= level <= max_level:
+                raise forms.ValidationError(
+                    f"Compression level must be from {min_level} "
+                    f"to {max_level}."
+                )
+
         return cleaned_data
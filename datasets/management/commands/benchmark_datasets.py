@@ -0,0 +1,75 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from datasets.services.benchmark import (
+    SCHEMAS, run_benchmarks, compare_reports
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure speed of data generators and dataset creation '
+        'and optionally compare it with baseline report.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[10000, 100000],
+            help='Numbers of rows of benchmarked datasets.'
+        )
+        parser.add_argument(
+            '--generator-size', type=int, default=100000,
+            help='Number of values, generated by every data generator.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Number of runs of every benchmark (the best is taken).'
+        )
+        parser.add_argument(
+            '--schema', choices=list(SCHEMAS), nargs='+', dest='schemas',
+            help='Benchmarked schemas (all by default).'
+        )
+        parser.add_argument(
+            '--output',
+            help='Path of json file for the report (stdout by default).'
+        )
+        parser.add_argument(
+            '--compare',
+            help='Path of json file with baseline report.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.1,
+            help='Max allowed relative regression against baseline.'
+        )
+
+    def handle(self, *args, **options):
+        report = run_benchmarks(
+            options['rows'], options['generator_size'],
+            repeat=options['repeat'], schemas=options['schemas']
+        )
+        data = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(data)
+        else:
+            self.stdout.write(data)
+
+        if not options['compare']:
+            return
+        with open(options['compare']) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(
+            baseline, report, options['threshold']
+        )
+        for name, baseline_value, value, change in regressions:
+            self.stderr.write(
+                f'{name}: {baseline_value:.6g} -> {value:.6g} '
+                f'({change:+.1%})'
+            )
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} metric(s) regressed by more than '
+                f'{options["threshold"]:.0%}.'
+            )
+        self.stderr.write('No regressions.')
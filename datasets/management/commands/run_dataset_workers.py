@@ -0,0 +1,59 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from datasets.services.job_queue import DatasetWorker
+
+
+def _run_worker(poll_interval: float) -> None:
+    """
+    Entry point for the worker's process.
+    """
+    try:
+        DatasetWorker(poll_interval_=poll_interval).run()
+    except KeyboardInterrupt:
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Run workers, which generate files for queued datasets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of worker processes.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Seconds to wait between polls of an empty queue.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process pending jobs in this process and exit.'
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = DatasetWorker().run_pending()
+            self.stdout.write(f'Processed {processed} job(s).')
+            return
+
+        # connections can't be shared between forked processes
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=_run_worker, args=(options['poll_interval'], )
+            )
+            for _ in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f'Started {len(processes)} worker(s).')
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+                process.join()
@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Create users for load tests (locustfile.py). '
+        'Existing users are kept, so the command can be run before '
+        'every load test.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count', type=int, default=50,
+            help='Number of users.'
+        )
+        parser.add_argument(
+            '--prefix', default='loadtest',
+            help='Prefix of usernames (<prefix>_<number>).'
+        )
+        parser.add_argument(
+            '--password', default='loadtest',
+            help='Password of every user.'
+        )
+
+    def handle(self, *args, **options):
+        user_model = get_user_model()
+        usernames = [
+            f'{options["prefix"]}_{number}'
+            for number in range(options['count'])
+        ]
+        existing = set(
+            user_model.objects.filter(username__in=usernames)
+            .values_list('username', flat=True)
+        )
+        # all users have the same password, so it's hashed once
+        password = make_password(options['password'])
+        created = user_model.objects.bulk_create([
+            user_model(username=username, password=password)
+            for username in usernames if username not in existing
+        ])
+        self.stdout.write(
+            f'Created {len(created)} user(s), '
+            f'{len(existing)} already existed.'
+        )
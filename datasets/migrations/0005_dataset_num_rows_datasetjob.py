@@ -0,0 +1,55 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0004_alter_dataset_file'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='schema',
+            options={'verbose_name': 'Schema', 'verbose_name_plural': 'Schemes'},
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='num_rows',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='schema',
+            name='name',
+            field=models.CharField(max_length=120, unique=True, verbose_name='Schema name'),
+        ),
+        migrations.AlterField(
+            model_name='schema',
+            name='quote_type',
+            field=models.CharField(choices=[("'", "Single quote (')"), ('"', 'Double quote (")')], default="'", max_length=10, verbose_name='Schema quote type'),
+        ),
+        migrations.AlterField(
+            model_name='schema',
+            name='separator',
+            field=models.CharField(choices=[(',', 'Comma (,)'), (';', 'Semicolon (;)'), ('\t', 'Tab (\\t)'), (' ', 'Space ( )'), ('|', 'Pipe (|)')], default=',', max_length=10, verbose_name='Schema separator'),
+        ),
+        migrations.CreateModel(
+            name='DatasetJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('worker', models.CharField(blank=True, max_length=120)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('dataset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='job', to='datasets.dataset')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
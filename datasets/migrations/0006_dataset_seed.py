@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0005_dataset_num_rows_datasetjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='seed',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
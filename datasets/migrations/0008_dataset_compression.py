@@ -0,0 +1,23 @@
+# Generated by Django 4.1.7 on 2026-10-18 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0007_datasetcacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='compression',
+            field=models.CharField(choices=[('NONE', 'None'), ('GZIP', 'Gzip'), ('ZSTD', 'Zstandard')], default='NONE', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='compression_level',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+    ]
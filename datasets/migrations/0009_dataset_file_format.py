@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0008_dataset_compression'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='file_format',
+            field=models.CharField(choices=[('CSV', 'CSV'), ('PARQUET', 'Parquet')], default='CSV', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0009_dataset_file_format'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dataset',
+            name='file_format',
+            field=models.CharField(choices=[('CSV', 'CSV'), ('TSV', 'TSV'), ('JSONL', 'JSON Lines'), ('SQL', 'SQL INSERT'), ('PARQUET', 'Parquet')], default='CSV', max_length=10),
+        ),
+    ]
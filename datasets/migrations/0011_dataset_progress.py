@@ -0,0 +1,38 @@
+# Generated by Django 4.1.7 on 2026-10-18 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0010_dataset_sink_formats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='bytes_written',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='rows_per_second',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='rows_written',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
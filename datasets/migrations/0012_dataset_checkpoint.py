@@ -0,0 +1,38 @@
+# Generated by Django 4.1.7 on 2026-10-18 13:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0011_dataset_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='checkpoint_offset',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='checkpoint_rows',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='entropy',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.AlterField(
+            model_name='dataset',
+            name='status',
+            field=models.CharField(choices=[('PROCESSED', 'Processed'), ('READY', 'Ready'), ('FAILED', 'Failed'), ('CANCELLED', 'Cancelled')], default='PROCESSED', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='datasetjob',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed'), ('CANCELLED', 'Cancelled')], default='PENDING', max_length=10),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0013_dataset_profile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dataset',
+            index=models.Index(fields=['schema', 'created_at'], name='datasets_da_schema__aeb168_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schema',
+            index=models.Index(fields=['author', 'created_at'], name='datasets_sc_author__16057e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schemacolumn',
+            index=models.Index(fields=['schema', 'order'], name='datasets_sc_schema__172dd9_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:46
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0014_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schemacolumn',
+            name='cardinality',
+            field=models.PositiveIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(1000000)]),
+        ),
+    ]
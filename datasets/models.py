@@ -1,9 +1,12 @@
 from django.db import models
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.validators import MinValueValidator, MaxValueValidator
 
 from datasets.services.column_data_generator import (
     IntColumnDataGenerator, StringColumnDataGenerator, JobColumnDataGenerator,
-    PhoneColumnDataGenerator, DateColumnDataGenerator
+    PhoneColumnDataGenerator, DateColumnDataGenerator,
+    FormattedStringColumnDataGenerator
 )
 
 
@@ -69,6 +72,10 @@ class Schema(TimeStampModel):
     class Meta:
         verbose_name = 'Schema'
         verbose_name_plural = 'Schemes'
+        indexes = [
+            # pages of schema list of the author
+            models.Index(fields=['author', 'created_at']),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -86,9 +93,14 @@ class Schema(TimeStampModel):
         Return list of fields (Child classes for SchemaColumns)
         sorted by 'order' field
         """
-        fields = get_field_from_column(self)
-        fields.sort(key=lambda item: item.order)
-        return fields
+        return get_schema_fields(self)[1]
+
+    def get_header_and_fields(self) -> tuple:
+        """
+        Return list of names of schema columns and list of fields
+        (Child classes for SchemaColumns) sorted by 'order' field.
+        """
+        return get_schema_fields(self)
 
     def get_header(self) -> list:
         """
@@ -122,6 +134,9 @@ class SchemaColumn(TimeStampModel):
         (JOB, 'Job field'),
         (DOMAIN, 'Domain name field'),
     ]
+    # field types, which values can be sampled from pool of distinct values
+    POOLED_FIELD_TYPES = [FULLNAME, EMAIL, TEXT, PHONE, COMPANY, DOMAIN]
+    MAX_CARDINALITY = 1_000_000
 
     order = models.IntegerField()
     name = models.CharField(max_length=30)
@@ -131,10 +146,31 @@ class SchemaColumn(TimeStampModel):
         default=DATE,
     )
     schema = models.ForeignKey(Schema, on_delete=models.CASCADE)
+    # number of distinct values of string-like column (unlimited if empty)
+    cardinality = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1), MaxValueValidator(MAX_CARDINALITY)]
+    )
+
+    class Meta:
+        indexes = [
+            # ordered columns of the schema
+            models.Index(fields=['schema', 'order']),
+        ]
 
     def __str__(self):
         return f'{self.field_type} column: {self.name}'
 
+    @property
+    def is_pooled(self) -> bool:
+        """
+        Return True, if values of the column are sampled from pool
+        with limited number of distinct values.
+        """
+        return bool(self.cardinality) and \
+            self.field_type in self.POOLED_FIELD_TYPES
+
 
 class DateColumnField(SchemaColumn):
     """
@@ -146,6 +182,10 @@ class DateColumnField(SchemaColumn):
         rand_date = gen.dump_date_value()
         return rand_date
 
+    @staticmethod
+    def get_data_generator(reference_date=None):
+        return DateColumnDataGenerator(reference_date)
+
 
 class IntegerColumnField(SchemaColumn):
     """
@@ -162,6 +202,9 @@ class IntegerColumnField(SchemaColumn):
         res = gen.dump_int_value()
         return res
 
+    def get_data_generator(self):
+        return IntColumnDataGenerator(self.lower_bound, self.upper_bound)
+
 
 class EmailColumnField(SchemaColumn):
     """
@@ -173,6 +216,12 @@ class EmailColumnField(SchemaColumn):
         res = gen.dump_str_value()
         return f'{res}@example.com'
 
+    @staticmethod
+    def get_data_generator():
+        return FormattedStringColumnDataGenerator(
+            6, 15, template_='{}@example.com'
+        )
+
 
 class FullNameColumnField(SchemaColumn):
     """
@@ -185,6 +234,12 @@ class FullNameColumnField(SchemaColumn):
         surname = gen.dump_str_value().capitalize()
         return f'{name} {surname}'
 
+    @staticmethod
+    def get_data_generator():
+        return FormattedStringColumnDataGenerator(
+            6, 15, words_number_=2, capitalize_=True
+        )
+
 
 class TextColumnField(SchemaColumn):
     """
@@ -201,6 +256,12 @@ class TextColumnField(SchemaColumn):
         res_text = '. '.join(sentences) + '.'
         return res_text
 
+    def get_data_generator(self):
+        return FormattedStringColumnDataGenerator(
+            30, 150, template_='{}.', words_number_=self.number_of_sentences,
+            separator_='. ', capitalize_=True
+        )
+
 
 class PhoneColumnField(SchemaColumn):
     """
@@ -212,6 +273,10 @@ class PhoneColumnField(SchemaColumn):
         phone = gen.dump_phone_value()
         return phone
 
+    @staticmethod
+    def get_data_generator():
+        return PhoneColumnDataGenerator()
+
 
 class CompanyColumnField(SchemaColumn):
     """
@@ -224,6 +289,12 @@ class CompanyColumnField(SchemaColumn):
         company_name = gen.dump_str_value().capitalize()
         return f'{company_name} and co.'
 
+    @staticmethod
+    def get_data_generator():
+        return FormattedStringColumnDataGenerator(
+            6, 14, template_='{} and co.', capitalize_=True
+        )
+
 
 class JobColumnField(SchemaColumn):
     """
@@ -235,6 +306,10 @@ class JobColumnField(SchemaColumn):
         job_name = gen.dump_job_value()
         return job_name
 
+    @staticmethod
+    def get_data_generator():
+        return JobColumnDataGenerator()
+
 
 class DomainNameColumnField(SchemaColumn):
     """
@@ -246,6 +321,10 @@ class DomainNameColumnField(SchemaColumn):
         host_value = gen.dump_str_value()
         return f'{host_value}.ua'
 
+    @staticmethod
+    def get_data_generator():
+        return FormattedStringColumnDataGenerator(6, 20, template_='{}.ua')
+
 
 class Dataset(TimeStampModel):
     """
@@ -253,9 +332,33 @@ class Dataset(TimeStampModel):
     """
     PROCESSED = 'PROCESSED'
     READY = 'READY'
+    FAILED = 'FAILED'
+    CANCELLED = 'CANCELLED'
     STATUS_CHOICES = [
         (PROCESSED, 'Processed'),
         (READY, 'Ready'),
+        (FAILED, 'Failed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+    NO_COMPRESSION = 'NONE'
+    GZIP = 'GZIP'
+    ZSTD = 'ZSTD'
+    COMPRESSION_CHOICES = [
+        (NO_COMPRESSION, 'None'),
+        (GZIP, 'Gzip'),
+        (ZSTD, 'Zstandard'),
+    ]
+    CSV = 'CSV'
+    TSV = 'TSV'
+    JSONL = 'JSONL'
+    SQL = 'SQL'
+    PARQUET = 'PARQUET'
+    FORMAT_CHOICES = [
+        (CSV, 'CSV'),
+        (TSV, 'TSV'),
+        (JSONL, 'JSON Lines'),
+        (SQL, 'SQL INSERT'),
+        (PARQUET, 'Parquet'),
     ]
 
     file = models.FileField(upload_to='datasets/', null=True, blank=True)
@@ -264,29 +367,148 @@ class Dataset(TimeStampModel):
         choices=STATUS_CHOICES,
         default=PROCESSED
     )
+    num_rows = models.PositiveIntegerField(default=0)
+    seed = models.PositiveBigIntegerField(null=True, blank=True)
+    # entropy of random streams (seed or random 128-bit number)
+    entropy = models.CharField(max_length=40, blank=True)
+    file_format = models.CharField(
+        max_length=10,
+        choices=FORMAT_CHOICES,
+        default=CSV
+    )
+    compression = models.CharField(
+        max_length=10,
+        choices=COMPRESSION_CHOICES,
+        default=NO_COMPRESSION
+    )
+    compression_level = models.PositiveSmallIntegerField(
+        null=True, blank=True
+    )
+    rows_written = models.PositiveBigIntegerField(default=0)
+    bytes_written = models.PositiveBigIntegerField(default=0)
+    rows_per_second = models.FloatField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # rows and bytes of the partial file, which are flushed to disk
+    checkpoint_rows = models.PositiveBigIntegerField(default=0)
+    checkpoint_offset = models.PositiveBigIntegerField(default=0)
+    # breakdown of generation time, if dataset is generated with profiling
+    profile = models.JSONField(null=True, blank=True)
     schema = models.ForeignKey(Schema, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # pages of dataset history of the schema
+            models.Index(fields=['schema', 'created_at']),
+        ]
+
     def __str__(self):
         return f'Datasets on {self.schema} schema ({self.status})'
 
+    @property
+    def progress(self):
+        """
+        Part of rows, which are already written (from 0 to 1).
+        """
+        if self.status == self.READY:
+            return 1.0
+        if not self.num_rows:
+            return None
+        return min(self.rows_written / self.num_rows, 1.0)
+
+    @property
+    def eta_seconds(self):
+        """
+        Estimated number of seconds until generation is finished.
+        """
+        if self.status == self.READY:
+            return 0.0
+        if not self.rows_per_second:
+            return None
+        remaining_rows = max(self.num_rows - self.rows_written, 0)
+        return remaining_rows / self.rows_per_second
+
 
-def get_field_from_column(schema):
+class DatasetJob(TimeStampModel):
     """
-    Return list with subclasses for SchemaColumn of all field types
-    (DateColumnField, IntegerColumnField etc.) from schema
+    Model, which represent queued job for generating dataset's file.
+    Jobs are claimed and processed by 'run_dataset_workers' command.
+    """
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    CANCELLED = 'CANCELLED'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+
+    dataset = models.OneToOneField(
+        Dataset,
+        on_delete=models.CASCADE,
+        related_name='job'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    worker = models.CharField(max_length=120, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'Job for dataset {self.dataset_id} ({self.status})'
+
+
+class DatasetCacheEntry(TimeStampModel):
+    """
+    Model, which represent generated file, that can be reused by datasets
+    with the same fingerprint (schema columns, parameters, number of rows
+    and seed). Evicted entries aren't reused anymore, their files are
+    removed only when no dataset points at them.
+    """
+    fingerprint = models.CharField(max_length=64, unique=True)
+    file_name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    hits = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f'Cached file {self.file_name} ({self.hits} hits)'
+
+
+def get_schema_fields(schema) -> tuple:
+    """
+    Return header and list with subclasses for SchemaColumn of all field types
+    (DateColumnField, IntegerColumnField etc.) from schema, ordered by
+    'order' field. Columns are resolved to their subclasses
+    with joins in one query.
     """
     field_classes_list = [
         DateColumnField, IntegerColumnField, FullNameColumnField,
         EmailColumnField, TextColumnField, PhoneColumnField,
         CompanyColumnField, JobColumnField, DomainNameColumnField,
     ]
-    column_pk_list = [item.pk for item in schema.schemacolumn_set.all()]
-    field_qss_list = []
-    for field_class in field_classes_list:
-        fields_qs = field_class.objects.filter(
-            schemacolumn_ptr_id__in=column_pk_list
-        )
-        field_qss_list.append(fields_qs)
-
-    from itertools import chain
-    return list(chain(*field_qss_list))
+    accessors = [
+        field_class._meta.model_name for field_class in field_classes_list
+    ]
+    columns = schema.schemacolumn_set.select_related(
+        *accessors
+    ).order_by('order')
+
+    fields = []
+    for column in columns:
+        for accessor in accessors:
+            try:
+                fields.append(getattr(column, accessor))
+                break
+            except ObjectDoesNotExist:
+                continue
+    header = [field.name for field in fields]
+    return header, fields
@@ -0,0 +1,159 @@
+from collections import Counter
+
+from django.core.exceptions import NON_FIELD_ERRORS
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from datasets.forms import SchemaColumnForm, DatasetGeneratorForm
+from datasets.models import Schema, SchemaColumn
+
+
+class SchemaColumnSerializer(serializers.Serializer):
+    """
+    Serializer for schema column of any field type. Bounds are required
+    for ranged integers and number of sentences for text.
+    """
+    name = serializers.CharField(
+        max_length=SchemaColumn._meta.get_field('name').max_length
+    )
+    order = serializers.IntegerField()
+    field_type = serializers.ChoiceField(
+        choices=SchemaColumn.FIELD_TYPE_CHOICES
+    )
+    lower_bound = serializers.IntegerField(required=False)
+    upper_bound = serializers.IntegerField(required=False)
+    number_of_sentences = serializers.IntegerField(
+        required=False, min_value=1
+    )
+    cardinality = serializers.IntegerField(
+        required=False, allow_null=True, min_value=1,
+        max_value=SchemaColumn.MAX_CARDINALITY
+    )
+
+    def validate(self, attrs):
+        field_type = attrs['field_type']
+        required = []
+        if field_type == SchemaColumn.RANGED_INT:
+            required = ['lower_bound', 'upper_bound']
+        elif field_type == SchemaColumn.TEXT:
+            required = ['number_of_sentences']
+        errors = {
+            name: 'This field is required'
+            for name in required if attrs.get(name) is None
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
+        if field_type == SchemaColumn.RANGED_INT \
+                and attrs['lower_bound'] > attrs['upper_bound']:
+            raise serializers.ValidationError(
+                {'upper_bound': 'Must not be less than lower bound'}
+            )
+        if attrs.get('cardinality') is not None \
+                and field_type not in SchemaColumn.POOLED_FIELD_TYPES:
+            raise serializers.ValidationError(
+                {'cardinality': 'Not supported by this field type'}
+            )
+        return attrs
+
+    def build_column(self, attrs):
+        """
+        Return unsaved column of subclass for field type.
+        """
+        field_type = attrs['field_type']
+        column_class = SchemaColumnForm.FIELD_TYPE_CLASSES[field_type]
+        params = {
+            name: attrs[name]
+            for name in ('name', 'order', 'field_type')
+        }
+        if field_type == SchemaColumn.RANGED_INT:
+            params['lower_bound'] = attrs['lower_bound']
+            params['upper_bound'] = attrs['upper_bound']
+        elif field_type == SchemaColumn.TEXT:
+            params['number_of_sentences'] = attrs['number_of_sentences']
+        if field_type in SchemaColumn.POOLED_FIELD_TYPES:
+            params['cardinality'] = attrs.get('cardinality')
+        return column_class(**params)
+
+
+class SchemaSerializer(serializers.Serializer):
+    """
+    Serializer for schema with its columns.
+    Schemas are identified by their unique names.
+    """
+    name = serializers.CharField(
+        max_length=Schema._meta.get_field('name').max_length
+    )
+    separator = serializers.ChoiceField(
+        choices=Schema.SEPARATOR_CHOICES, default=Schema.COMMA
+    )
+    quote_type = serializers.ChoiceField(
+        choices=Schema.QUOTE_CHOICES, default=Schema.SINGLE_QUOTE
+    )
+    columns = SchemaColumnSerializer(many=True, allow_empty=False)
+
+    def validate_columns(self, columns):
+        """ validate names and order through all columns of schema """
+        orders = [column['order'] for column in columns]
+        if len(set(orders)) != len(orders):
+            raise serializers.ValidationError(
+                'Orders in one schema must have distinct values'
+            )
+        names = [column['name'] for column in columns]
+        if len(set(names)) != len(names):
+            raise serializers.ValidationError(
+                'Names in one schema must be different'
+            )
+        return columns
+
+    def build_schema(self, attrs) -> tuple:
+        """
+        Return unsaved schema and list of its unsaved columns.
+        """
+        schema = Schema(
+            name=attrs['name'],
+            separator=attrs['separator'],
+            quote_type=attrs['quote_type']
+        )
+        column_serializer = self.fields['columns'].child
+        columns = [
+            column_serializer.build_column(column)
+            for column in attrs['columns']
+        ]
+        return schema, columns
+
+
+class SchemaListSerializer(serializers.ListSerializer):
+    """
+    Serializer for list of schemas with unique names.
+    """
+    child = SchemaSerializer()
+
+    def validate(self, attrs):
+        names = Counter(schema['name'] for schema in attrs)
+        duplicates = sorted(name for name, count in names.items() if count > 1)
+        if duplicates:
+            raise serializers.ValidationError(
+                f'Schema names are duplicated: {", ".join(duplicates)}'
+            )
+        return attrs
+
+
+class DatasetSpecSerializer(serializers.Serializer):
+    """
+    Serializer for specification of dataset to generate: id of schema
+    and parameters of generation, which are validated by the same form
+    as on schema detail page.
+    """
+    schema = serializers.IntegerField()
+
+    def to_internal_value(self, data):
+        attrs = super().to_internal_value(data)
+        form = DatasetGeneratorForm(data)
+        if not form.is_valid():
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY
+                if name == NON_FIELD_ERRORS else name: list(errors)
+                for name, errors in form.errors.items()
+            })
+        attrs.update(form.cleaned_data)
+        return attrs
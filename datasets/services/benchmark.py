@@ -0,0 +1,203 @@
+import os
+import time
+import platform
+import tempfile
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from datasets.models import (
+    Schema, SchemaColumn, DateColumnField, EmailColumnField,
+    IntegerColumnField, TextColumnField, FullNameColumnField,
+    PhoneColumnField, CompanyColumnField, JobColumnField,
+    DomainNameColumnField
+)
+from datasets.services.csv_writer import CsvGenerator
+from datasets.services.row_plan import get_row_plan, invalidate_row_plan
+
+# bump it, when names or meaning of measured metrics change
+BENCHMARK_VERSION = 1
+
+# {field type: (column class, parameters of the column)}
+COLUMN_TYPES = {
+    SchemaColumn.DATE: (DateColumnField, {}),
+    SchemaColumn.RANGED_INT: (
+        IntegerColumnField, {'lower_bound': 0, 'upper_bound': 10 ** 6}
+    ),
+    SchemaColumn.FULLNAME: (FullNameColumnField, {}),
+    SchemaColumn.EMAIL: (EmailColumnField, {}),
+    SchemaColumn.TEXT: (TextColumnField, {'number_of_sentences': 5}),
+    SchemaColumn.PHONE: (PhoneColumnField, {}),
+    SchemaColumn.COMPANY: (CompanyColumnField, {}),
+    SchemaColumn.JOB: (JobColumnField, {}),
+    SchemaColumn.DOMAIN: (DomainNameColumnField, {}),
+}
+
+# {schema name: list of (field type, parameters overriding defaults)}
+SCHEMAS = {
+    'narrow': [
+        (SchemaColumn.RANGED_INT, {}),
+        (SchemaColumn.JOB, {}),
+        (SchemaColumn.PHONE, {}),
+    ],
+    'wide': [
+        (field_type, {}) for field_type in COLUMN_TYPES
+    ] * 3,
+    'text': [
+        (SchemaColumn.RANGED_INT, {}),
+        (SchemaColumn.TEXT, {'number_of_sentences': 20}),
+    ],
+}
+
+
+def _get_column(field_type: str, **params) -> SchemaColumn:
+    column_class, default_params = COLUMN_TYPES[field_type]
+    return column_class(
+        field_type=field_type, **{**default_params, **params}
+    )
+
+
+def _best_time(func, repeat: int) -> float:
+    """
+    Return the best of 'repeat' wall times of the function.
+    """
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def _metric(value: float, unit: str, higher_is_better: bool = True) -> dict:
+    return {
+        'value': value,
+        'unit': unit,
+        'higher_is_better': higher_is_better,
+    }
+
+
+def benchmark_generators(size: int, repeat: int) -> dict:
+    """
+    Measure values per second of data generator of every column type.
+    """
+    results = {}
+    rng = np.random.default_rng(0)
+    for field_type in COLUMN_TYPES:
+        generator = _get_column(field_type).get_data_generator()
+        seconds = _best_time(lambda: generator.dump_batch(size, rng), repeat)
+        results[f'generator.{field_type}'] = _metric(
+            size / seconds, 'values/s'
+        )
+    return results
+
+
+def _create_schema(author, name: str, columns: list) -> Schema:
+    schema = Schema.objects.create(name=f'benchmark_{name}', author=author)
+    for order, (field_type, params) in enumerate(columns, start=1):
+        column = _get_column(field_type, **params)
+        column.order = order
+        column.name = f'{field_type.lower()}_{order}'
+        column.schema = schema
+        column.save()
+    return schema
+
+
+def benchmark_schema(schema: Schema, name: str, rows_numbers: list,
+                     repeat: int) -> dict:
+    """
+    Measure queries of schema load and rows and megabytes per second
+    of end-to-end dataset creation for every number of rows.
+    """
+    invalidate_row_plan(schema.pk)
+    with CaptureQueriesContext(connection) as queries:
+        get_row_plan(schema)
+    results = {
+        f'queries.schema_load.{name}': _metric(
+            len(queries), 'queries', higher_is_better=False
+        ),
+    }
+
+    for num_rows in rows_numbers:
+        datasets = []
+
+        def create_dataset():
+            datasets.append(CsvGenerator(schema, num_rows).generate_dataset())
+
+        with CaptureQueriesContext(connection) as queries:
+            create_dataset()
+        seconds = _best_time(create_dataset, repeat)
+        size = datasets[-1].file.size
+        for dataset in datasets:
+            dataset.file.delete(save=False)
+
+        prefix = f'dataset.{name}.{num_rows}'
+        results.update({
+            f'{prefix}.rows_per_second': _metric(
+                num_rows / seconds, 'rows/s'
+            ),
+            f'{prefix}.mb_per_second': _metric(
+                size / seconds / 1024 ** 2, 'MB/s'
+            ),
+            f'{prefix}.queries': _metric(
+                len(queries), 'queries', higher_is_better=False
+            ),
+        })
+    return results
+
+
+def run_benchmarks(rows_numbers: list, generator_size: int,
+                   repeat: int = 3, schemas: list = None) -> dict:
+    """
+    Run all benchmarks and return report with their results.
+    Schemas and datasets are created in rolled back transaction
+    and files are written into temporary media root, so benchmarks
+    don't leave anything behind.
+    """
+    results = benchmark_generators(generator_size, repeat)
+    with tempfile.TemporaryDirectory() as media_root, override_settings(
+        MEDIA_ROOT=media_root, DATASET_CACHE_ENABLED=False
+    ), transaction.atomic():
+        author = get_user_model().objects.create(
+            username=f'benchmark_{os.getpid()}'
+        )
+        for name in schemas or SCHEMAS:
+            schema = _create_schema(author, name, SCHEMAS[name])
+            results.update(
+                benchmark_schema(schema, name, rows_numbers, repeat)
+            )
+        transaction.set_rollback(True)
+
+    return {
+        'version': BENCHMARK_VERSION,
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'results': results,
+    }
+
+
+def compare_reports(baseline: dict, report: dict,
+                    threshold: float) -> list:
+    """
+    Return list of (name, baseline value, value, relative change)
+    for metrics, which got worse than in baseline by more than threshold.
+    """
+    regressions = []
+    for name, metric in report['results'].items():
+        baseline_metric = baseline['results'].get(name)
+        if not baseline_metric or not baseline_metric['value']:
+            continue
+        change = (
+            metric['value'] - baseline_metric['value']
+        ) / baseline_metric['value']
+        if not metric['higher_is_better']:
+            change = -change
+        if change < -threshold:
+            regressions.append(
+                (name, baseline_metric['value'], metric['value'], change)
+            )
+    return regressions
@@ -1,6 +1,12 @@
-import random
 import datetime
-from string import ascii_lowercase
+from itertools import product
+from string import ascii_lowercase, ascii_uppercase, digits
+
+import numpy as np
+
+
+# shared random generator, used by column data generators by default
+global_rng = np.random.default_rng()
 
 
 class IntColumnDataGenerator:
@@ -11,31 +17,138 @@ class IntColumnDataGenerator:
         self._lower_bound = lower_bound_
         self._upper_bound = upper_bound_
 
+    @property
+    def lower_bound(self) -> int:
+        return self._lower_bound
+
+    @property
+    def upper_bound(self) -> int:
+        return self._upper_bound
+
+    def dump_array(self, size: int,
+                   rng: np.random.Generator = None) -> np.ndarray:
+        """
+        Return array with 'size' randomly generated integer values
+        """
+        rng = rng or global_rng
+        return rng.integers(
+            self._lower_bound, self._upper_bound, size=size, endpoint=True
+        )
+
+    def dump_batch(self, size: int,
+                   rng: np.random.Generator = None) -> list:
+        """
+        Return list with 'size' randomly generated integer values
+        """
+        return self.dump_array(size, rng).tolist()
+
+    @staticmethod
+    def get_characters() -> tuple:
+        """
+        Return set of characters, which values can contain,
+        and set of characters, which every value contains
+        """
+        return frozenset('-' + digits), frozenset()
+
     def dump_int_value(self) -> int:
         """
         Return randomly generated integer value
         """
-        res = random.randint(self._lower_bound, self._upper_bound)
-        return res
+        return self.dump_batch(1)[0]
 
 
 class StringColumnDataGenerator:
     """
     Class for generating string value of a length between min and max values
     """
-    def __init__(self, min_len_: int, max_len_: int):
+    def __init__(self, min_len_: int, max_len_: int, capitalize_=False):
         self._min_len = min_len_
         self._max_len = max_len_
+        self._capitalize = capitalize_
+
+    def dump_batch(self, size: int,
+                   rng: np.random.Generator = None) -> list:
+        """
+        Return list with 'size' randomly generated string values.
+        All characters of the batch are sampled at once into one buffer,
+        which is then sliced into separate strings.
+        """
+        rng = rng or global_rng
+        lengths = rng.integers(
+            self._min_len, self._max_len, size=size, endpoint=True
+        )
+        ends = np.cumsum(lengths)
+        total_length = int(ends[-1]) if size else 0
+        chars = rng.integers(
+            ord('a'), ord('z'), size=total_length, dtype=np.uint8,
+            endpoint=True
+        )
+        starts = ends - lengths
+        if self._capitalize:
+            chars[starts[lengths > 0]] -= ord('a') - ord('A')
+        buffer = chars.tobytes().decode('ascii')
+        return [
+            buffer[start:end]
+            for start, end in zip(starts.tolist(), ends.tolist())
+        ]
+
+    def get_characters(self) -> tuple:
+        """
+        Return set of characters, which values can contain,
+        and set of characters, which every value contains
+        """
+        characters = ascii_lowercase
+        if self._capitalize:
+            characters += ascii_uppercase
+        return frozenset(characters), frozenset()
 
     def dump_str_value(self) -> str:
         """
         Return randomly generated string value
         """
-        res = ''.join(
-            random.choice(ascii_lowercase)
-            for _ in range(random.randint(self._min_len, self._max_len))
-        )
-        return res
+        return self.dump_batch(1)[0]
+
+
+class FormattedStringColumnDataGenerator(StringColumnDataGenerator):
+    """
+    Class for generating string value from several random words,
+    joined by separator and put into format template
+    """
+    def __init__(self, min_len_: int, max_len_: int, template_='{}',
+                 words_number_=1, separator_=' ', capitalize_=False):
+        super().__init__(min_len_, max_len_, capitalize_)
+        self._template = template_
+        self._words_number = words_number_
+        self._separator = separator_
+
+    def dump_batch(self, size: int,
+                   rng: np.random.Generator = None) -> list:
+        """
+        Return list with 'size' randomly generated formatted string values.
+        Without words every value is empty template.
+        """
+        words_number = self._words_number
+        if words_number < 1:
+            return [self._template.format('')] * size
+        words = super().dump_batch(size * words_number, rng)
+        if words_number > 1:
+            join = self._separator.join
+            words = [
+                join(words[index:index + words_number])
+                for index in range(0, len(words), words_number)
+            ]
+        return list(map(self._template.format, words))
+
+    def get_characters(self) -> tuple:
+        """
+        Return set of characters, which values can contain,
+        and set of characters, which every value contains
+        """
+        word_characters, _ = super().get_characters()
+        required = set(self._template.replace('{}', ''))
+        if self._words_number > 1:
+            required.update(self._separator)
+        return word_characters | required, frozenset(required)
 
 
 class JobColumnDataGenerator:
@@ -44,40 +157,198 @@ class JobColumnDataGenerator:
     """
     LEVEL_CHOICES = ['Trainee', 'Junior', 'Middle', 'Senior', 'Lead']
     LANGUAGE_CHOICES = ['Python', 'Java', 'Go', 'Ruby', 'C#', 'C++', 'C']
+    JOB_CHOICES = [
+        f'{level} {language} developer'
+        for level, language in product(LEVEL_CHOICES, LANGUAGE_CHOICES)
+    ]
+
+    def dump_indices(self, size: int,
+                     rng: np.random.Generator = None) -> np.ndarray:
+        """
+        Return array with indices of 'size' random job names in JOB_CHOICES
+        """
+        rng = rng or global_rng
+        return rng.integers(0, len(self.JOB_CHOICES), size=size)
+
+    def dump_batch(self, size: int,
+                   rng: np.random.Generator = None) -> list:
+        """
+        Return list with 'size' randomly generated job names
+        """
+        jobs = self.JOB_CHOICES
+        return [jobs[index] for index in self.dump_indices(size, rng).tolist()]
+
+    @classmethod
+    def get_characters(cls) -> tuple:
+        """
+        Return set of characters, which values can contain,
+        and set of characters, which every value contains
+        """
+        job_characters = [frozenset(job) for job in cls.JOB_CHOICES]
+        return (
+            frozenset.union(*job_characters),
+            frozenset.intersection(*job_characters)
+        )
 
     def dump_job_value(self) -> str:
         """
         Return randomly generated job name
         """
-        level = random.choice(self.LEVEL_CHOICES)
-        language = random.choice(self.LANGUAGE_CHOICES)
-        return f'{level} {language} developer'
+        return self.dump_batch(1)[0]
 
 
 class PhoneColumnDataGenerator:
     """
     Class for generating phone with a +380 at the begging
     """
-    @staticmethod
-    def dump_phone_value() -> str:
+    PREFIX = '+380'
+    DIGITS_NUMBER = 9
+
+    @classmethod
+    def dump_batch(cls, size: int,
+                   rng: np.random.Generator = None) -> list:
+        """
+        Return list with 'size' randomly generated phones as string values.
+        Every phone is built as a row of ascii codes in one 2D array.
+        """
+        rng = rng or global_rng
+        prefix = np.frombuffer(cls.PREFIX.encode('ascii'), dtype=np.uint8)
+        codes = np.empty((size, len(prefix) + cls.DIGITS_NUMBER), np.uint8)
+        codes[:, :len(prefix)] = prefix
+        codes[:, len(prefix):] = rng.integers(
+            ord('0'), ord('9'), size=(size, cls.DIGITS_NUMBER),
+            dtype=np.uint8, endpoint=True
+        )
+        phones = codes.view(f'S{codes.shape[1]}').ravel()
+        return phones.astype(str).tolist()
+
+    @classmethod
+    def get_characters(cls) -> tuple:
+        """
+        Return set of characters, which values can contain,
+        and set of characters, which every value contains
+        """
+        return frozenset(cls.PREFIX + digits), frozenset(cls.PREFIX)
+
+    @classmethod
+    def dump_phone_value(cls) -> str:
         """
         Return randomly generated phone as a string value
         """
-        phone = '+380'
-        for _ in range(9):
-            phone += str(random.randint(0, 9))
-        return phone
+        return cls.dump_batch(1)[0]
 
 
 class DateColumnDataGenerator:
     """
     Class for generating random date
     """
+    MAX_DAYS_AGO = 365 * 10
+
+    def __init__(self, reference_date_: datetime.datetime = None):
+        self._reference_date = reference_date_
+
+    def dump_array(self, size: int,
+                   rng: np.random.Generator = None) -> np.ndarray:
+        """
+        Return datetime64 array with 'size' randomly generated dates
+        before the reference date (current moment by default)
+        """
+        rng = rng or global_rng
+        reference_date = np.datetime64(
+            self._reference_date or datetime.datetime.now(), 'us'
+        )
+        days_ago = rng.integers(
+            0, self.MAX_DAYS_AGO, size=size, endpoint=True
+        )
+        return reference_date - days_ago.astype('timedelta64[D]')
+
+    def dump_batch(self, size: int,
+                   rng: np.random.Generator = None) -> list:
+        """
+        Return list with 'size' randomly generated dates
+        before the reference date (current moment by default)
+        """
+        return self.dump_array(size, rng).tolist()
+
     @staticmethod
-    def dump_date_value() -> datetime.datetime:
+    def get_characters() -> tuple:
+        """
+        Return set of characters, which values can contain,
+        and set of characters, which every value contains
+        (values are written as 'YYYY-MM-DD HH:MM:SS[.ffffff]')
+        """
+        return frozenset(digits + '-: .'), frozenset('-: ')
+
+    def dump_date_value(self) -> datetime.datetime:
         """
         Return randomly generated date
         """
-        nowadays = datetime.datetime.now()
-        res_dt = nowadays - datetime.timedelta(days=random.randint(0, 365*10))
-        return res_dt
+        return self.dump_batch(1)[0]
+
+
+class PooledColumnDataGenerator:
+    """
+    Class for sampling values of another generator from pool
+    of 'cardinality' distinct values. Pool is built once by own random
+    stream, which is spawned by pool key (identity of the column), so it's
+    the same in every process and for every seed, but columns with
+    the same type and cardinality get different pools. Only indices
+    of values are sampled for every batch.
+    """
+    POOL_SEED = 0
+
+    def __init__(self, generator_, cardinality_: int, pool_key_: int = 0):
+        self._generator = generator_
+        self._cardinality = cardinality_
+        self._pool_key = pool_key_
+        self._pool = None
+
+    @property
+    def cardinality(self) -> int:
+        return self._cardinality
+
+    @property
+    def pool(self) -> np.ndarray:
+        """
+        Return object array with distinct values, which is built
+        on the first access
+        """
+        if self._pool is None:
+            self._pool = self._build_pool()
+        return self._pool
+
+    def _build_pool(self) -> np.ndarray:
+        rng = np.random.default_rng(np.random.SeedSequence(
+            self.POOL_SEED, spawn_key=(self._pool_key, )
+        ))
+        values = {}
+        while len(values) < self._cardinality:
+            missing = self._cardinality - len(values)
+            values.update(dict.fromkeys(
+                self._generator.dump_batch(missing, rng)
+            ))
+        pool = np.empty(self._cardinality, dtype=object)
+        pool[:] = list(values)
+        return pool
+
+    def dump_indices(self, size: int,
+                     rng: np.random.Generator = None) -> np.ndarray:
+        """
+        Return array with indices of 'size' random values in pool
+        """
+        rng = rng or global_rng
+        return rng.integers(0, self._cardinality, size=size)
+
+    def dump_batch(self, size: int,
+                   rng: np.random.Generator = None) -> list:
+        """
+        Return list with 'size' values, randomly sampled from pool
+        """
+        return self.pool[self.dump_indices(size, rng)].tolist()
+
+    def get_characters(self) -> tuple:
+        """
+        Return set of characters, which values can contain,
+        and set of characters, which every value contains
+        """
+        return self._generator.get_characters()
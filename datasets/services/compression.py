@@ -0,0 +1,95 @@
+import gzip
+import io
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from datasets.models import Dataset
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+# {compression: (file extension, content encoding, mime type)}
+COMPRESSION_FORMATS = {
+    Dataset.GZIP: ('.gz', 'gzip', 'application/gzip'),
+    Dataset.ZSTD: ('.zst', 'zstd', 'application/zstd'),
+}
+# {compression: (min level, max level, default level)}
+COMPRESSION_LEVELS = {
+    Dataset.GZIP: (1, 9, 6),
+    Dataset.ZSTD: (1, 22, 3),
+}
+
+
+def is_compression_available(compression: str) -> bool:
+    """
+    Return True, if the compression can be used in this environment.
+    """
+    return compression != Dataset.ZSTD or zstandard is not None
+
+
+def get_compression_level(compression: str, level: int = None) -> int:
+    """
+    Return level of the compression or its default level.
+    """
+    if compression == Dataset.NO_COMPRESSION:
+        return None
+    min_level, max_level, default_level = COMPRESSION_LEVELS[compression]
+    if level is None:
+        return default_level
+    return min(max(level, min_level), max_level)
+
+
+def get_file_extension(compression: str) -> str:
+    """
+    Return extension, which is appended to the name of compressed file.
+    """
+    if compression == Dataset.NO_COMPRESSION:
+        return ''
+    return COMPRESSION_FORMATS[compression][0]
+
+
+def _open_compressor(file, compression: str, level: int = None,
+                     threads: int = None):
+    """
+    Return binary stream, which compresses written data into the file.
+    Closing of the stream finishes compressed member (frame),
+    but doesn't close the file.
+    """
+    level = get_compression_level(compression, level)
+    if compression == Dataset.GZIP:
+        # zero mtime keeps output of seeded datasets reproducible
+        return gzip.GzipFile(
+            fileobj=file, mode='wb', compresslevel=level, mtime=0
+        )
+    if compression == Dataset.ZSTD:
+        if threads is None:
+            threads = settings.DATASET_COMPRESSION_THREADS
+        compressor = zstandard.ZstdCompressor(level=level, threads=threads)
+        return compressor.stream_writer(file, closefd=False)
+    raise ValueError(f'Unknown compression: {compression}')
+
+
+@contextmanager
+def open_text_writer(file, compression: str = Dataset.NO_COMPRESSION,
+                     level: int = None, threads: int = None):
+    """
+    Context manager for text stream, which writes csv text into binary
+    file, compressing it on the fly. Every opened stream writes separate
+    gzip member (zstd frame), so written parts may be just concatenated.
+    The file stays open after exit.
+    """
+    if compression == Dataset.NO_COMPRESSION:
+        stream = file
+    else:
+        stream = _open_compressor(file, compression, level, threads)
+    text = io.TextIOWrapper(stream, encoding='UTF8', newline='')
+    try:
+        yield text
+    finally:
+        text.flush()
+        text.detach()
+        if stream is not file:
+            stream.close()
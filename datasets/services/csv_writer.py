@@ -1,74 +1,690 @@
-import csv
+import io
 import os
+import glob
+import shutil
+import multiprocessing
+from typing import NamedTuple
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import numpy as np
 from django.core.files.base import File
 from django.conf import settings
+from django.utils import timezone
 
 from datasets.models import Schema, Dataset
+from datasets.services.dataset_cache import DatasetCache, get_fingerprint
+from datasets.services.row_plan import RowPlan, get_row_plan
+from datasets.services.compression import (
+    open_text_writer, get_compression_level, get_file_extension
+)
+from datasets.services.sinks import DatasetSink, get_sink_class
+from datasets.services.progress import DatasetProgress, GenerationCancelled
+from datasets.services.profiler import GenerationProfiler
+from datasets.services.metrics import track_generation
+
+# rows written by every shard of worker process: shared array of counters
+_shard_rows = None
+# flag, which asks shards of worker processes to stop
+_shard_stop = None
+
+
+class RandomBlock(NamedTuple):
+    """
+    Block of rows with own random streams of columns. Every block is
+    generated as a whole, chunk takes its rows from start to stop.
+    """
+    size: int
+    rngs: list
+    start: int
+    stop: int
+
+
+class SpoolFile(File):
+    """
+    Finished spool file of dataset. Like uploaded temporary files,
+    it's moved by file system storage into its final path instead of
+    copying, other storages read it as usual.
+    """
+    def __init__(self, file, path: str):
+        super().__init__(file)
+        self.path = path
+
+    def temporary_file_path(self) -> str:
+        return self.path
+
+
+def _append_file(src, dst) -> None:
+    """
+    Append whole content of src file to the end of dst file (binary files).
+    Content is copied by kernel via sendfile, if it is available,
+    otherwise it is copied by one pass through the buffer.
+    """
+    dst.flush()
+    offset = 0
+    size = os.fstat(src.fileno()).st_size
+    try:
+        while offset < size:
+            sent = os.sendfile(
+                dst.fileno(), src.fileno(), offset, size - offset
+            )
+            if not sent:
+                break
+            offset += sent
+    except (AttributeError, OSError):
+        # sendfile isn't supported by platform or file system
+        pass
+    dst.seek(0, os.SEEK_END)
+    if offset < size:
+        src.seek(offset)
+        shutil.copyfileobj(src, dst, settings.DATASET_FILE_BUFFER_SIZE)
+
+
+def _init_shard_worker(shard_rows, shard_stop) -> None:
+    """
+    Initializer of worker processes, which keeps shared counters
+    of written rows and stop flag.
+    """
+    global _shard_rows, _shard_stop
+    _shard_rows = shard_rows
+    _shard_stop = shard_stop
 
 
 class CsvGenerator:
     """
     Class for creating dataset and generating dump data file.
+    Data is generated by chunks: every column of the chunk is built at once
+    by its data generator, then the chunk is transposed into rows.
+    Rows are split into blocks of fixed size, every column of every block
+    gets its own random stream, derived from the seed, so the same seed
+    always gives the same data regardless of the number of processes
+    and the chunk size. Chunk may span several blocks.
+    Chunks are serialized by the sink of dataset's file format,
+    text formats may be compressed on the fly by gzip or zstd.
+    With profiling, time of every column and stage of generation
+    is measured and stored in the dataset.
     """
-    def __init__(self, schema_: Schema, num_rows_: int) -> None:
+    # rows of one random block; it's part of generated data,
+    # so it mustn't depend on settings
+    RNG_BLOCK_SIZE = 4 * 1024
+
+    def __init__(self, schema_: Schema, num_rows_: int,
+                 chunk_size_: int = None, processes_: int = None,
+                 seed_: int = None,
+                 compression_: str = Dataset.NO_COMPRESSION,
+                 compression_level_: int = None,
+                 file_format_: str = Dataset.CSV,
+                 entropy_: int = None,
+                 profile_: bool = None,
+                 plan_: RowPlan = None) -> None:
         super(CsvGenerator, self).__init__()
         self.schema = schema_
         self.num_rows = num_rows_
+        self.chunk_size = chunk_size_ or settings.DATASET_CHUNK_SIZE
+        self.processes = processes_ or settings.DATASET_GENERATION_PROCESSES
+        self.seed = seed_
+        if seed_ is not None:
+            self.entropy = seed_
+        elif entropy_ is not None:
+            self.entropy = entropy_
+        else:
+            self.entropy = np.random.SeedSequence().entropy
+        self.file_format = file_format_
+        self.compression = compression_
+        self.compression_level = get_compression_level(
+            compression_, compression_level_
+        )
+        if profile_ is None:
+            profile_ = settings.DATASET_PROFILING_ENABLED
+        self.profile = profile_
+        self.profiler = None
+        self._plan = plan_
+        self._sink = None
 
     @classmethod
-    def _generate_row(cls, fields) -> list:
+    def from_dataset(cls, dataset: Dataset, **kwargs):
+        """
+        Return generator with parameters stored in the dataset.
+        """
+        return cls(
+            dataset.schema, dataset.num_rows, seed_=dataset.seed,
+            entropy_=int(dataset.entropy) if dataset.entropy else None,
+            compression_=dataset.compression,
+            compression_level_=dataset.compression_level,
+            file_format_=dataset.file_format,
+            **kwargs
+        )
+
+    @property
+    def plan(self) -> RowPlan:
+        """
+        Compiled plan of schema's row (header, columns and data generators).
+        """
+        if self._plan is None:
+            self._plan = get_row_plan(self.schema)
+        return self._plan
+
+    @property
+    def sink(self) -> DatasetSink:
+        """
+        Output sink of dataset's file format.
+        """
+        if self._sink is None:
+            self._sink = get_sink_class(self.file_format)(
+                self.schema, self.plan,
+                seeded_=self.seed is not None,
+                compression_=self.compression,
+                compression_level_=self.compression_level
+            )
+        return self._sink
+
+    def _get_rngs(self, block_index: int, columns_number: int) -> list:
+        """
+        Return list with independent random generators for every column
+        of the block. Streams depend only on entropy, block index and
+        column index.
+        """
+        return [
+            np.random.default_rng(np.random.SeedSequence(
+                self.entropy, spawn_key=(block_index, column_index)
+            ))
+            for column_index in range(columns_number)
+        ]
+
+    def _get_blocks(self, first_row: int, size: int,
+                    columns_number: int) -> list:
+        """
+        Return list with random blocks, which cover rows of the chunk.
+        Blocks at the edges of the chunk may be covered partially.
+        """
+        block_size = self.RNG_BLOCK_SIZE
+        blocks = []
+        for block_index in range(
+            first_row // block_size,
+            -(-(first_row + size) // block_size)
+        ):
+            block_start = block_index * block_size
+            blocks.append(RandomBlock(
+                min(block_size, self.num_rows - block_start),
+                self._get_rngs(block_index, columns_number),
+                max(first_row - block_start, 0),
+                min(first_row + size - block_start, block_size)
+            ))
+        return blocks
+
+    def _chunks(self, first_row: int, num_rows: int):
+        """
+        Generator-func for first rows and sizes of chunks,
+        which cover number of rows starting from the first row
+        """
+        last_row = first_row + num_rows
+        for start in range(first_row, last_row, self.chunk_size):
+            yield start, min(self.chunk_size, last_row - start)
+
+    def _get_generators(self) -> tuple:
+        """
+        Return data generators for ordered schema columns.
+        """
+        if self.seed is not None:
+            return self.plan.seeded_generators
+        return self.plan.generators
+
+    def _write_chunks(self, file, generators, first_row: int = 0,
+                      num_rows: int = None):
+        """
+        Generator-func, which writes chunks of rows into the file
+        by the sink and yields number of rows of every written chunk.
+        """
+        if num_rows is None:
+            num_rows = self.num_rows
+        sink = self.sink
+        for start, size in self._chunks(first_row, num_rows):
+            blocks = self._get_blocks(start, size, len(generators))
+            if self.profiler is None:
+                sink.write_chunk(file, generators, blocks)
+            else:
+                self._write_profiled_chunk(file, generators, blocks)
+            yield size
+
+    def _measure(self, name: str):
         """
-        Method for generating one row of values via fields.
-        Fields its ordered list of child classes for SchemaColumn,
-        as DateColumnField, FullNameColumnField etc.
+        Return context manager, which measures time of the section,
+        if generation is profiled.
         """
-        return [field.generate_dump_value() for field in fields]
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.measure(name)
 
-    def _data_generator(self):
+    def _write_profiled_chunk(self, file, generators, blocks: list) -> None:
         """
-        Generator-func for generator with dump data for specific number of rows
+        Write chunk by the sink and measure time of every column,
+        serialization and writing into the file. Columns are generated
+        one by one, so compiled row function isn't used. Binary sinks
+        serialize and write chunk at once, it's counted as serialization.
         """
-        fields = self.schema.ordered_fields
-        for i in range(self.num_rows):
-            yield self._generate_row(fields)
+        sink = self.sink
+        columns = []
+        for index, (name, column, generator) in enumerate(zip(
+            self.plan.header, self.plan.columns, generators
+        )):
+            with self.profiler.measure(
+                f'column {name} ({column["field_type"]})'
+            ):
+                columns.append(
+                    sink.generate_chunk_column(generator, index, blocks)
+                )
+
+        if sink.is_binary:
+            with self.profiler.measure('serialization'):
+                sink.write_columns(file, generators, columns)
+            return
+        buffer = io.StringIO()
+        with self.profiler.measure('serialization'):
+            sink.write_columns(buffer, generators, columns)
+        with self.profiler.measure('file_io'):
+            file.write(buffer.getvalue())
+
+    def _open_dump_file(self, file_path: str, mode: str = 'wb'):
+        """
+        Open binary file for dump data with large write buffer.
+        """
+        return open(file_path, mode,
+                    buffering=settings.DATASET_FILE_BUFFER_SIZE)
+
+    def _open_text_writer(self, file):
+        """
+        Return context manager for text stream, which writes text
+        into binary file and compresses it, if it's needed.
+        """
+        return open_text_writer(
+            file, self.compression, self.compression_level
+        )
+
+    def _get_shards(self) -> list:
+        """
+        Return list with first row and number of rows for every shard.
+        Shards consist of whole chunks, so every process gets
+        about the same number of chunks.
+        """
+        chunks_number = -(-self.num_rows // self.chunk_size)
+        shards_number = min(self.processes, chunks_number)
+        shards = []
+        first_row = 0
+        for index in range(shards_number):
+            shard_chunks = chunks_number // shards_number
+            if index < chunks_number % shards_number:
+                shard_chunks += 1
+            shard_rows = min(
+                shard_chunks * self.chunk_size, self.num_rows - first_row
+            )
+            shards.append((first_row, shard_rows))
+            first_row += shard_rows
+        return shards
+
+    def _generate_shard_file(self, generators, first_row: int,
+                             num_rows: int, file_path: str,
+                             index: int = 0):
+        """
+        Function for filling part file with dump data (without header).
+        It's executed in the worker process, so it mustn't touch database.
+        Written rows are counted in shared counter of the shard,
+        shard stops after the chunk, if stop flag is set.
+        Part is compressed as separate gzip member (zstd frame),
+        so compression runs in parallel as well.
+        Return time of profiled sections of the shard or None.
+        """
+        if self.profiler is not None:
+            self.profiler = GenerationProfiler()
+        with self._open_dump_file(file_path) as f:
+            with self._open_text_writer(f) as text:
+                for size in self._write_chunks(
+                    text, generators, first_row, num_rows
+                ):
+                    if _shard_rows is not None:
+                        _shard_rows[index] += size
+                    if _shard_stop is not None and _shard_stop.value:
+                        raise GenerationCancelled('Shard is stopped')
+        if self.profiler is not None:
+            return self.profiler.sections
+        return None
+
+    def _write_shards(self, file, generators,
+                      progress: DatasetProgress = None) -> None:
+        """
+        Generate shards in parallel processes into part files
+        and append them in order to the binary file.
+        Progress is tracked by shared counters of shards
+        and sizes of part files. If generation is cancelled,
+        shards are stopped after their current chunks.
+        """
+        shards = self._get_shards()
+        part_paths = [
+            f'{file.name}.part{index}' for index in range(len(shards))
+        ]
+        shard_rows = multiprocessing.RawArray('q', len(shards))
+        shard_stop = multiprocessing.RawValue('b', 0)
+        with ProcessPoolExecutor(
+            max_workers=len(shards),
+            initializer=_init_shard_worker,
+            initargs=(shard_rows, shard_stop)
+        ) as executor:
+            futures = [
+                executor.submit(
+                    self._generate_shard_file, generators, first_row,
+                    rows, part_path, index
+                )
+                for index, ((first_row, rows), part_path) in enumerate(
+                    zip(shards, part_paths)
+                )
+            ]
+            not_done = futures
+            while not_done:
+                _, not_done = wait(
+                    not_done, timeout=settings.DATASET_PROGRESS_INTERVAL
+                )
+                if progress is None:
+                    continue
+                try:
+                    progress.update(
+                        sum(shard_rows),
+                        file.tell() + sum(
+                            os.path.getsize(part_path)
+                            for part_path in part_paths
+                            if os.path.exists(part_path)
+                        )
+                    )
+                except GenerationCancelled:
+                    shard_stop.value = 1
+                    raise
+            for future in futures:
+                sections = future.result()
+                if sections:
+                    self.profiler.merge(sections, len(shards))
+
+        for part_path in part_paths:
+            with open(part_path, 'rb') as src, self._measure('file_io'):
+                _append_file(src, file)
+            os.remove(part_path)
+
+    @staticmethod
+    def _track_chunks(chunk_sizes, progress: DatasetProgress, file,
+                      text=None, rows_written: int = 0) -> int:
+        """
+        Exhaust iterator with sizes of written chunks and update progress
+        by number of written rows and position of the binary file.
+        If text stream is given, chunks are flushed to disk and saved
+        as checkpoint not more often than progress is saved.
+        Return number of written rows.
+        """
+        for size in chunk_sizes:
+            rows_written += size
+            if text is None:
+                progress.update(rows_written, file.tell())
+            elif progress.is_due():
+                text.flush()
+                file.flush()
+                os.fsync(file.fileno())
+                progress.checkpoint(rows_written, file.tell())
+        return rows_written
+
+    def _is_parallel(self) -> bool:
+        return self.processes > 1 and self.num_rows > self.chunk_size
+
+    def _is_resumable(self) -> bool:
+        """
+        Only uncompressed text, written by one process, can be truncated
+        to the checkpoint and continued. Other files are generated
+        from zero again.
+        """
+        return (
+            not self.sink.is_binary
+            and self.compression == Dataset.NO_COMPRESSION
+            and not self._is_parallel()
+        )
+
+    @staticmethod
+    def _get_spool_path(dataset: Dataset) -> str:
+        """
+        Return path of partial file of the dataset. It's in directory
+        of dataset files, so the finished file is published by rename.
+        Every dataset has one job, so concurrent jobs have own files.
+        """
+        upload_to = Dataset._meta.get_field('file').upload_to
+        return os.path.join(
+            settings.MEDIA_ROOT, upload_to, f'.spool_{dataset.pk}'
+        )
+
+    def _get_resume_row(self, dataset: Dataset, file_path: str) -> int:
+        """
+        Return row, from which generation of the dataset can be continued
+        after the last checkpoint, or 0, if it must start from zero.
+        """
+        rows = dataset.checkpoint_rows
+        if not rows or not self._is_resumable():
+            return 0
+        if not os.path.exists(file_path) or \
+                os.path.getsize(file_path) < dataset.checkpoint_offset:
+            return 0
+        return rows
+
+    @classmethod
+    def remove_partial_files(cls, dataset: Dataset) -> None:
+        """
+        Remove partial file of unfinished dataset and its shard parts.
+        """
+        file_path = cls._get_spool_path(dataset)
+        for path in [file_path] + glob.glob(f'{glob.escape(file_path)}.part*'):
+            if os.path.exists(path):
+                os.remove(path)
 
     def _generate_dump_file(self, file_name: str, dataset: Dataset) -> None:
         """
         Function for creating and filling file with dump data.
+        Data is written once into spool file of the dataset, which is
+        moved into storage, when it's finished.
+        Uncompressed text is checkpointed after every chunk and continued
+        from the last checkpoint, if previous generation has been
+        interrupted.
         """
-        file_path = os.path.join(settings.MEDIA_ROOT, 'temp_data_file.csv')
-        with open(file_path, 'w+', encoding='UTF8', newline='') as f:
-            file = File(f)
-            writer = csv.writer(
-                file,
-                delimiter=self.schema.separator,
-                quotechar=self.schema.quote_type
-            )
-            header = self.schema.get_header()
-            writer.writerow(header)
+        if self.profile:
+            self.profiler = GenerationProfiler()
+        file_path = self._get_spool_path(dataset)
+        # storage creates directories on save, but spool file is before it
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        generators = self._get_generators()
+        sink = self.sink
+        progress = DatasetProgress(dataset)
+        first_row = self._get_resume_row(dataset, file_path)
+        progress.start(first_row)
+        if first_row:
+            f = self._open_dump_file(file_path, 'r+b')
+            f.truncate(dataset.checkpoint_offset)
+            f.seek(0, os.SEEK_END)
+        else:
+            f = self._open_dump_file(file_path, 'w+b')
+
+        with f:
+            if sink.is_binary:
+                sink.write_header(f)
+                self._track_chunks(
+                    self._write_chunks(f, generators), progress, f
+                )
+                sink.write_footer(f)
+            elif self._is_parallel():
+                with self._open_text_writer(f) as text:
+                    sink.write_header(text)
+                self._write_shards(f, generators, progress)
+                with self._open_text_writer(f) as text:
+                    sink.write_footer(text)
+            else:
+                with self._open_text_writer(f) as text:
+                    if not first_row:
+                        sink.write_header(text)
+                    self._track_chunks(
+                        self._write_chunks(
+                            text, generators, first_row,
+                            self.num_rows - first_row
+                        ),
+                        progress, f,
+                        text if self._is_resumable() else None,
+                        first_row
+                    )
+                    sink.write_footer(text)
 
-            for row in self._data_generator():
-                writer.writerow(row)
+            f.seek(0, os.SEEK_END)
+            progress.finish(self.num_rows, f.tell())
+            f.seek(0)
+            with self._measure('file_save'):
+                dataset.file.save(
+                    file_name, SpoolFile(f, file_path), save=False
+                )
+            if self.profiler is not None:
+                dataset.profile = self.profiler.get_report()
+                self.profiler = None
 
-            import time
-            time.sleep(2)
+        if os.path.exists(file_path):
+            # storage has copied the file instead of moving it
+            os.remove(file_path)
 
-            dataset.file.save(file_name, file)
-            dataset.status = Dataset.READY
+    def stream_csv(self):
+        """
+        Generator-func for text of dump data in text format of the sink:
+        header and then chunks of rows. Nothing is written to disk,
+        so it can be used for streaming responses.
+        """
+        sink = self.sink
+        buffer = io.StringIO()
+        sink.write_header(buffer)
+        yield buffer.getvalue()
 
-        os.remove(file_path)
+        buffer.seek(0)
+        buffer.truncate()
+        for _ in self._write_chunks(buffer, self._get_generators()):
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
 
-    def generate_dataset(self) -> Dataset:
+        sink.write_footer(buffer)
+        if buffer.getvalue():
+            yield buffer.getvalue()
+
+    def _is_cacheable(self) -> bool:
         """
-        General function for creating file and filling it with dump data.
-        Also creating dataset and attaching it to our generated file.
+        Only seeded datasets are cached, because unseeded request
+        asks for new random data.
+        """
+        return self.seed is not None and settings.DATASET_CACHE_ENABLED
+
+    def get_fingerprint(self) -> str:
         """
-        dataset = Dataset.objects.create(
+        Return fingerprint of all parameters, which define generated data.
+        """
+        params = {}
+        if self.file_format == Dataset.SQL:
+            # INSERT statements are written into table named after schema
+            params['table_name'] = self.schema.name
+        return get_fingerprint(
+            columns=self.plan.columns,
+            separator=self.schema.separator,
+            quote_type=self.schema.quote_type,
+            num_rows=self.num_rows,
+            seed=self.seed,
+            compression=self.compression,
+            compression_level=self.compression_level,
+            file_format=self.file_format,
+            **params
+        )
+
+    def get_cached_dataset(self):
+        """
+        Return new READY dataset with the file from cache
+        or None, if there is no such file.
+        """
+        if not self._is_cacheable():
+            return None
+        return DatasetCache().get_dataset(
+            self.get_fingerprint(),
+            num_rows=self.num_rows,
+            seed=self.seed,
+            compression=self.compression,
+            compression_level=self.compression_level,
+            file_format=self.file_format,
+            schema=self.schema
+        )
+
+    def build_dataset(self) -> Dataset:
+        """
+        Return unsaved dataset in PROCESSED status without generated file.
+        """
+        return Dataset(
             status=Dataset.PROCESSED,
+            num_rows=self.num_rows,
+            seed=self.seed,
+            entropy=str(self.entropy),
+            compression=self.compression,
+            compression_level=self.compression_level,
+            file_format=self.file_format,
             schema=self.schema
         )
-        file_name = f'{self.schema.name}_{dataset.created_at}.csv'
-        self._generate_dump_file(file_name, dataset)
+
+    def create_dataset(self) -> Dataset:
+        """
+        Create dataset in PROCESSED status without generated file.
+        """
+        dataset = self.build_dataset()
         dataset.save()
+        return dataset
 
+    @staticmethod
+    def _save_result(dataset: Dataset) -> None:
+        """
+        Save generated file of the dataset and mark it as READY only
+        while it's still PROCESSED, so cancel isn't overwritten.
+        File of cancelled dataset is removed and GenerationCancelled
+        is raised.
+        """
+        is_saved = Dataset.objects.filter(
+            pk=dataset.pk, status=Dataset.PROCESSED
+        ).update(
+            file=dataset.file.name,
+            profile=dataset.profile,
+            status=Dataset.READY,
+            updated_at=timezone.now()
+        )
+        if not is_saved:
+            dataset.file.delete(save=False)
+            raise GenerationCancelled(
+                f'Generation of dataset {dataset.pk} is cancelled'
+            )
+        dataset.status = Dataset.READY
+
+    def fill_dataset(self, dataset: Dataset) -> Dataset:
+        """
+        Generate file with dump data for already created dataset
+        and mark dataset as READY.
+        """
+        file_name = (
+            f'{self.schema.name}_{dataset.created_at}{self.sink.extension}'
+        )
+        if not self.sink.is_binary:
+            file_name += get_file_extension(self.compression)
+        self._generate_dump_file(file_name, dataset)
+        self._save_result(dataset)
+
+        if self._is_cacheable():
+            DatasetCache().put_dataset(self.get_fingerprint(), dataset)
         return dataset
+
+    def generate_dataset(self) -> Dataset:
+        """
+        General function for creating file and filling it with dump data.
+        Also creating dataset and attaching it to our generated file.
+        Seeded dataset reuses the file from cache, if it's there.
+        Result of generation is counted in metrics.
+        """
+        dataset = self.get_cached_dataset()
+        if dataset is not None:
+            return dataset
+        dataset = self.create_dataset()
+        with track_generation(dataset, lambda: len(self.plan.header)):
+            return self.fill_dataset(dataset)
@@ -0,0 +1,129 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from datasets.models import Dataset, DatasetCacheEntry
+
+# bump it, when the same parameters start to give different generated data
+FINGERPRINT_VERSION = 2
+
+
+def get_columns_description(fields) -> list:
+    """
+    Return list with type, name and parameters of every ordered field.
+    """
+    return [
+        {
+            'order': field.order,
+            'name': field.name,
+            'field_type': field.field_type,
+            'lower_bound': getattr(field, 'lower_bound', None),
+            'upper_bound': getattr(field, 'upper_bound', None),
+            'number_of_sentences': getattr(
+                field, 'number_of_sentences', None
+            ),
+            'cardinality': field.cardinality if field.is_pooled else None,
+        }
+        for field in fields
+    ]
+
+
+def get_fingerprint(**params) -> str:
+    """
+    Return sha256 hex digest of json with parameters.
+    """
+    data = json.dumps(
+        {'version': FINGERPRINT_VERSION, **params},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(data.encode('utf8')).hexdigest()
+
+
+class DatasetCache:
+    """
+    Class for content-addressed cache of generated dataset files.
+    Entries are evicted in LRU order, when total size of cached files
+    exceeds max size. Cached files are files of datasets, so evicted
+    file is deleted only when no dataset points at it anymore.
+    """
+    def __init__(self, max_size_: int = None):
+        self.max_size = max_size_ or settings.DATASET_CACHE_MAX_SIZE
+
+    def get_dataset(self, fingerprint: str, **dataset_fields):
+        """
+        Return new READY dataset, which points at cached file,
+        or None if there is no such file in cache.
+        """
+        with transaction.atomic():
+            # entry is locked, so it can't be evicted before the dataset
+            # starts to point at its file
+            entry = DatasetCacheEntry.objects.select_for_update().filter(
+                fingerprint=fingerprint
+            ).first()
+            if entry is None:
+                return None
+
+            DatasetCacheEntry.objects.filter(pk=entry.pk).update(
+                hits=F('hits') + 1,
+                last_used_at=timezone.now()
+            )
+            return Dataset.objects.create(
+                status=Dataset.READY,
+                file=entry.file_name,
+                **dataset_fields
+            )
+
+    def put_dataset(self, fingerprint: str, dataset: Dataset) -> None:
+        """
+        Store file of generated dataset in cache and evict old entries.
+        """
+        try:
+            with transaction.atomic():
+                entry = DatasetCacheEntry.objects.create(
+                    fingerprint=fingerprint,
+                    file_name=dataset.file.name,
+                    size=dataset.file.size,
+                    last_used_at=timezone.now()
+                )
+        except IntegrityError:
+            # the same file has been already cached by concurrent job
+            return
+        self.evict(keep_entry=entry)
+
+    def evict(self, keep_entry: DatasetCacheEntry = None) -> None:
+        """
+        Remove least recently used entries, until total size of cache
+        doesn't exceed max size. File of the entry is deleted only
+        if no dataset points at it, so READY datasets keep their files.
+        """
+        entries = DatasetCacheEntry.objects.all()
+        if keep_entry is not None:
+            entries = entries.exclude(pk=keep_entry.pk)
+        total_size = DatasetCacheEntry.objects.aggregate(
+            total_size=Sum('size')
+        )['total_size'] or 0
+
+        for entry in entries.order_by('last_used_at').iterator():
+            if total_size <= self.max_size:
+                break
+            self._remove_entry(entry)
+            total_size -= entry.size
+
+    @staticmethod
+    def _remove_entry(entry: DatasetCacheEntry) -> None:
+        with transaction.atomic():
+            deleted, _ = DatasetCacheEntry.objects.select_for_update().filter(
+                pk=entry.pk
+            ).delete()
+            is_referenced = Dataset.objects.filter(
+                file=entry.file_name
+            ).exists()
+            if deleted and not is_referenced:
+                transaction.on_commit(
+                    lambda: default_storage.delete(entry.file_name)
+                )
@@ -0,0 +1,230 @@
+import os
+import socket
+import time
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from datasets.models import Schema, Dataset, DatasetJob
+from datasets.services.csv_writer import CsvGenerator
+from datasets.services.metrics import track_generation
+from datasets.services.progress import GenerationCancelled
+from datasets.services.row_plan import get_row_plan
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_dataset(schema: Schema, num_rows: int, seed: int = None,
+                    compression: str = Dataset.NO_COMPRESSION,
+                    compression_level: int = None,
+                    file_format: str = Dataset.CSV) -> Dataset:
+    """
+    Create dataset in PROCESSED status and pending job for its generation.
+    If the file is in cache already, READY dataset is returned without job.
+    """
+    csv_generator = CsvGenerator(
+        schema, num_rows, seed_=seed,
+        compression_=compression,
+        compression_level_=compression_level,
+        file_format_=file_format
+    )
+    dataset = csv_generator.get_cached_dataset()
+    if dataset is not None:
+        return dataset
+
+    with transaction.atomic():
+        dataset = csv_generator.create_dataset()
+        DatasetJob.objects.create(dataset=dataset)
+    return dataset
+
+
+def enqueue_datasets(specs: list) -> list:
+    """
+    Create datasets and pending jobs for list of specs (dicts with schema,
+    num_rows and optional seed, compression, compression_level and
+    file_format). Plan of every schema is loaded once (only seeded datasets
+    need it), datasets and jobs are created by bulk queries
+    in one transaction. Cached seeded datasets
+    are returned READY without jobs. Return list of (dataset, job or None)
+    in order of specs.
+    """
+    plans = {}
+    results = [None] * len(specs)
+    generators = []
+    for index, spec in enumerate(specs):
+        schema = spec['schema']
+        if spec.get('seed') is not None and schema.pk not in plans:
+            # fingerprint of cached file depends on the plan
+            plans[schema.pk] = get_row_plan(schema)
+        csv_generator = CsvGenerator(
+            schema, spec['num_rows'], seed_=spec.get('seed'),
+            compression_=spec.get('compression', Dataset.NO_COMPRESSION),
+            compression_level_=spec.get('compression_level'),
+            file_format_=spec.get('file_format', Dataset.CSV),
+            plan_=plans.get(schema.pk)
+        )
+        dataset = csv_generator.get_cached_dataset()
+        if dataset is None:
+            generators.append((index, csv_generator))
+        else:
+            results[index] = (dataset, None)
+
+    datasets = [
+        csv_generator.build_dataset() for _, csv_generator in generators
+    ]
+    using = router.db_for_write(Dataset)
+    with transaction.atomic(using=using):
+        if connections[using].features.can_return_rows_from_bulk_insert:
+            Dataset.objects.using(using).bulk_create(datasets)
+        else:
+            # primary keys of datasets are needed for their jobs
+            for dataset in datasets:
+                dataset.save(using=using)
+        jobs = DatasetJob.objects.using(using).bulk_create([
+            DatasetJob(dataset=dataset) for dataset in datasets
+        ])
+    for (index, _), dataset, job in zip(generators, datasets, jobs):
+        results[index] = (dataset, job)
+    return results
+
+
+def _get_claimable_jobs():
+    """
+    Return queryset of pending jobs and running jobs, whose datasets
+    haven't made progress for too long (their workers have died).
+    """
+    stale_before = timezone.now() - timedelta(
+        seconds=settings.DATASET_JOB_STALE_TIMEOUT
+    )
+    return DatasetJob.objects.filter(
+        Q(status=DatasetJob.PENDING) |
+        Q(
+            status=DatasetJob.RUNNING,
+            updated_at__lt=stale_before,
+            dataset__updated_at__lt=stale_before
+        )
+    )
+
+
+def claim_next_job(worker: str):
+    """
+    Atomically claim the oldest pending (or stale running) job for the
+    worker. Job is claimed by conditional update, so the same job
+    can't be claimed by two workers. Return None if there are no jobs.
+    """
+    while True:
+        pending_pks = list(
+            _get_claimable_jobs()
+            .order_by('created_at', 'pk')
+            .values_list('pk', flat=True)[:10]
+        )
+        if not pending_pks:
+            return None
+
+        for job_pk in pending_pks:
+            is_claimed = _get_claimable_jobs().filter(pk=job_pk).update(
+                status=DatasetJob.RUNNING,
+                worker=worker,
+                started_at=timezone.now(),
+                updated_at=timezone.now()
+            )
+            if is_claimed:
+                return DatasetJob.objects.select_related(
+                    'dataset__schema'
+                ).get(pk=job_pk)
+
+
+def run_job(job: DatasetJob) -> DatasetJob:
+    """
+    Generate file for dataset of claimed job and store result of the job.
+    Partial files of cancelled or failed generation are removed.
+    Result is counted in metrics, even if generation fails before
+    the file is written (e.g. on building of the plan).
+    """
+    dataset = job.dataset
+    csv_generator = None
+    try:
+        with track_generation(
+            dataset, lambda: len(csv_generator.plan.header)
+        ):
+            csv_generator = CsvGenerator.from_dataset(dataset)
+            csv_generator.fill_dataset(dataset)
+    except GenerationCancelled:
+        logger.info('Generation of dataset %s is cancelled', dataset.pk)
+        job.status = DatasetJob.CANCELLED
+        CsvGenerator.remove_partial_files(dataset)
+    except Exception as exc:
+        logger.exception('Generation of dataset %s failed', dataset.pk)
+        job.status = DatasetJob.FAILED
+        job.error = repr(exc)
+        Dataset.objects.filter(
+            pk=dataset.pk, status=Dataset.PROCESSED
+        ).update(status=Dataset.FAILED, finished_at=timezone.now())
+        # spool file may be left by previous interrupted run of the job
+        CsvGenerator.remove_partial_files(dataset)
+    else:
+        job.status = DatasetJob.DONE
+
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def cancel_dataset(dataset: Dataset) -> bool:
+    """
+    Cancel generation of PROCESSED dataset. Pending job is cancelled
+    at once, running job is stopped by its worker after current chunk.
+    Return False, if the dataset isn't processed anymore.
+    """
+    with transaction.atomic():
+        is_cancelled = Dataset.objects.filter(
+            pk=dataset.pk, status=Dataset.PROCESSED
+        ).update(
+            status=Dataset.CANCELLED,
+            finished_at=timezone.now(),
+            updated_at=timezone.now()
+        )
+        if is_cancelled:
+            DatasetJob.objects.filter(
+                dataset_id=dataset.pk, status=DatasetJob.PENDING
+            ).update(
+                status=DatasetJob.CANCELLED,
+                finished_at=timezone.now(),
+                updated_at=timezone.now()
+            )
+    return bool(is_cancelled)
+
+
+class DatasetWorker:
+    """
+    Class for worker, which claims pending jobs and generates their datasets.
+    """
+    def __init__(self, name_: str = None, poll_interval_: float = 1.0):
+        self.name = name_ or f'{socket.gethostname()}:{os.getpid()}'
+        self.poll_interval = poll_interval_
+
+    def run_pending(self) -> int:
+        """
+        Process pending jobs until queue is empty.
+        Return number of processed jobs.
+        """
+        processed = 0
+        job = claim_next_job(self.name)
+        while job is not None:
+            run_job(job)
+            processed += 1
+            job = claim_next_job(self.name)
+        return processed
+
+    def run(self) -> None:
+        """
+        Process jobs forever, polling the queue when it is empty.
+        """
+        logger.info('Dataset worker %s started', self.name)
+        while True:
+            if not self.run_pending():
+                time.sleep(self.poll_interval)
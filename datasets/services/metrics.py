@@ -0,0 +1,160 @@
+"""
+Prometheus metrics of dataset generation and HTTP requests.
+Metrics of web and worker processes are aggregated by /metrics,
+if all processes share PROMETHEUS_MULTIPROC_DIR environment variable
+(empty directory, which is cleaned before start).
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from django.db.models import Count, Min
+from django.utils import timezone
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from datasets.models import Dataset, DatasetJob
+from datasets.services.progress import GenerationCancelled
+
+# upper bounds of schema width buckets, used as label of durations
+SCHEMA_WIDTHS = (5, 10, 20, 50)
+
+DATASETS_STARTED = Counter(
+    'datasets_started_total',
+    'Number of started dataset generations',
+    ['file_format']
+)
+DATASETS_FINISHED = Counter(
+    'datasets_finished_total',
+    'Number of dataset generations finished successfully',
+    ['file_format']
+)
+DATASETS_FAILED = Counter(
+    'datasets_failed_total',
+    'Number of failed dataset generations',
+    ['file_format']
+)
+DATASETS_CANCELLED = Counter(
+    'datasets_cancelled_total',
+    'Number of cancelled dataset generations',
+    ['file_format']
+)
+ROWS_GENERATED = Counter(
+    'dataset_rows_generated_total',
+    'Number of rows of finished datasets',
+    ['file_format']
+)
+BYTES_GENERATED = Counter(
+    'dataset_bytes_generated_total',
+    'Number of bytes of finished dataset files',
+    ['file_format']
+)
+GENERATION_DURATION = Histogram(
+    'dataset_generation_duration_seconds',
+    'Duration of finished dataset generations',
+    ['schema_width'],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600, float('inf'))
+)
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Latency of HTTP requests',
+    ['view', 'method', 'status']
+)
+
+
+def get_schema_width(columns_number: int) -> str:
+    """
+    Return label of bucket with number of schema columns,
+    so number of label values stays small.
+    """
+    lower_bound = 1
+    for upper_bound in SCHEMA_WIDTHS:
+        if columns_number <= upper_bound:
+            return f'{lower_bound}-{upper_bound}'
+        lower_bound = upper_bound + 1
+    return f'{lower_bound}+'
+
+
+@contextmanager
+def track_generation(dataset: Dataset, get_columns_number):
+    """
+    Count started generation of the dataset and its result.
+    Rows, bytes and duration are observed for finished generation only,
+    number of schema columns for label of duration is returned by
+    the callable after generation, so the plan may be built inside.
+    """
+    file_format = dataset.file_format
+    DATASETS_STARTED.labels(file_format).inc()
+    started = time.perf_counter()
+    try:
+        yield
+    except GenerationCancelled:
+        DATASETS_CANCELLED.labels(file_format).inc()
+        raise
+    except Exception:
+        DATASETS_FAILED.labels(file_format).inc()
+        raise
+    DATASETS_FINISHED.labels(file_format).inc()
+    ROWS_GENERATED.labels(file_format).inc(dataset.num_rows)
+    BYTES_GENERATED.labels(file_format).inc(dataset.bytes_written)
+    GENERATION_DURATION.labels(
+        get_schema_width(get_columns_number())
+    ).observe(time.perf_counter() - started)
+
+
+class JobQueueCollector:
+    """
+    Collector of job queue gauges. They are queried from database
+    on every scrape, so they are the same in every process.
+    """
+    def collect(self):
+        jobs = GaugeMetricFamily(
+            'dataset_jobs', 'Number of dataset jobs by status',
+            labels=['status']
+        )
+        counts = dict(
+            DatasetJob.objects
+            .filter(status__in=(DatasetJob.PENDING, DatasetJob.RUNNING))
+            .values_list('status')
+            .annotate(count=Count('pk'))
+        )
+        for status in (DatasetJob.PENDING, DatasetJob.RUNNING):
+            jobs.add_metric([status], counts.get(status, 0))
+        yield jobs
+
+        oldest = DatasetJob.objects.filter(
+            status=DatasetJob.PENDING
+        ).aggregate(created_at=Min('created_at'))['created_at']
+        age = 0.0
+        if oldest is not None:
+            age = (timezone.now() - oldest).total_seconds()
+        yield GaugeMetricFamily(
+            'dataset_oldest_pending_job_age_seconds',
+            'Age of the oldest pending dataset job',
+            value=age
+        )
+
+
+def is_multiprocess_mode() -> bool:
+    """
+    Return True, if metrics of every process are written into files
+    of PROMETHEUS_MULTIPROC_DIR and must be aggregated on scrape.
+    """
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def generate_metrics() -> bytes:
+    """
+    Return text exposition of all metrics. In multiprocess mode
+    metrics are aggregated over all processes, which write them,
+    otherwise metrics of the current process are exposed.
+    """
+    registry = CollectorRegistry()
+    registry.register(JobQueueCollector())
+    if is_multiprocess_mode():
+        MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY) + generate_latest(registry)
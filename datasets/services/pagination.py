@@ -0,0 +1,62 @@
+import base64
+import datetime
+from typing import NamedTuple
+
+from django.db.models import Q
+
+
+class KeysetPage(NamedTuple):
+    """
+    Page of objects, ordered from the newest to the oldest,
+    with cursor of the next page (None for the last page).
+    """
+    object_list: list
+    next_cursor: str
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+def encode_cursor(obj) -> str:
+    """
+    Return cursor, which points right after the object.
+    """
+    value = f'{obj.created_at.isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Return (created_at, pk) of the cursor.
+    Raise ValueError, if the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = (
+            base64.urlsafe_b64decode(padded).decode().split('|')
+        )
+        return datetime.datetime.fromisoformat(created_at), int(pk)
+    except ValueError as error:
+        raise ValueError(f'Invalid cursor: {cursor!r}') from error
+
+
+def paginate_by_keyset(queryset, cursor: str, size: int) -> KeysetPage:
+    """
+    Return page of the queryset ordered by descending creation time.
+    Instead of offset, the page starts after the object of the cursor,
+    so every page is read by one query, which goes through index
+    on (<filtered field>, created_at) from the cursor's position.
+    Raise ValueError, if the cursor is malformed.
+    """
+    queryset = queryset.order_by('-created_at', '-pk')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+    objects = list(queryset[:size + 1])
+    if len(objects) <= size:
+        return KeysetPage(objects, None)
+    objects = objects[:size]
+    return KeysetPage(objects, encode_cursor(objects[-1]))
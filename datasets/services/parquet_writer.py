@@ -0,0 +1,104 @@
+from datasets.models import SchemaColumn, Dataset
+import numpy as np
+
+from datasets.services.column_data_generator import (
+    IntColumnDataGenerator, JobColumnDataGenerator, DateColumnDataGenerator,
+    PooledColumnDataGenerator
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # parquet output is optional
+    pa = pq = None
+
+# {dataset compression: parquet compression codec}
+PARQUET_CODECS = {
+    Dataset.NO_COMPRESSION: 'none',
+    Dataset.GZIP: 'gzip',
+    Dataset.ZSTD: 'zstd',
+}
+
+
+def is_parquet_available() -> bool:
+    """
+    Return True, if pyarrow is installed and parquet can be written.
+    """
+    return pa is not None
+
+
+def get_arrow_type(field_type: str, cardinality: int = None):
+    """
+    Return arrow type of the column with schema field type
+    and cardinality of its pool (if values are sampled from pool).
+    """
+    if cardinality:
+        return pa.dictionary(pa.int32(), pa.string())
+    if field_type == SchemaColumn.RANGED_INT:
+        return pa.int64()
+    if field_type == SchemaColumn.DATE:
+        return pa.timestamp('us')
+    if field_type == SchemaColumn.JOB:
+        return pa.dictionary(pa.int8(), pa.string())
+    return pa.string()
+
+
+def get_arrow_schema(header, columns):
+    """
+    Return arrow schema for header and description of schema columns.
+    """
+    return pa.schema([
+        pa.field(
+            name,
+            get_arrow_type(column['field_type'], column.get('cardinality'))
+        )
+        for name, column in zip(header, columns)
+    ])
+
+
+def build_arrow_pool(generator: PooledColumnDataGenerator):
+    """
+    Return arrow array with values of the pool of the generator.
+    """
+    return pa.array(generator.pool, type=pa.string())
+
+
+def build_arrow_column(generator, arrow_type, size: int, rng,
+                       arrow_pool=None):
+    """
+    Return arrow array with 'size' values of the column. Typed columns
+    are built from numpy arrays without python objects, job names and
+    values of pools (arrow_pool is built by build_arrow_pool) are
+    dictionary-encoded. Random stream is consumed exactly like dump_batch.
+    """
+    if isinstance(generator, (IntColumnDataGenerator,
+                              DateColumnDataGenerator)):
+        return pa.array(generator.dump_array(size, rng), type=arrow_type)
+    if isinstance(generator, JobColumnDataGenerator):
+        return pa.DictionaryArray.from_arrays(
+            pa.array(generator.dump_indices(size, rng), type=pa.int8()),
+            pa.array(generator.JOB_CHOICES, type=pa.string())
+        )
+    if isinstance(generator, PooledColumnDataGenerator):
+        indices = generator.dump_indices(size, rng)
+        if generator.cardinality > size:
+            # dictionary of the chunk has only values, which it uses
+            used, indices = np.unique(indices, return_inverse=True)
+            arrow_pool = arrow_pool.take(used)
+        return pa.DictionaryArray.from_arrays(
+            pa.array(indices, type=pa.int32()), arrow_pool
+        )
+    return pa.array(generator.dump_batch(size, rng), type=arrow_type)
+
+
+def open_parquet_writer(file, arrow_schema, compression: str,
+                        compression_level: int = None):
+    """
+    Return parquet writer of binary file with compression codec,
+    which corresponds to dataset compression.
+    """
+    return pq.ParquetWriter(
+        file, arrow_schema,
+        compression=PARQUET_CODECS[compression],
+        compression_level=compression_level
+    )
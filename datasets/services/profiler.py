@@ -0,0 +1,58 @@
+import time
+from contextlib import contextmanager
+
+
+class GenerationProfiler:
+    """
+    Class for collecting time spent in named sections of dataset's
+    generation. Time of the same section is summed over all chunks.
+    If shards are generated in parallel, time of their sections
+    is averaged over processes, so sections and 'other' add up
+    to wall-clock time of generation.
+    """
+    def __init__(self):
+        self.sections = {}
+        self._started = time.perf_counter()
+
+    def add(self, name: str, seconds: float) -> None:
+        self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+    def merge(self, sections: dict, processes: int = 1) -> None:
+        """
+        Add time of sections, measured by another profiler in one of
+        the processes, which have run in parallel.
+        """
+        for name, seconds in sections.items():
+            self.add(name, seconds / processes)
+
+    @contextmanager
+    def measure(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def get_report(self) -> dict:
+        """
+        Return JSON-serializable report with seconds and share of every
+        section. Time, which isn't covered by sections, is reported
+        as 'other'.
+        """
+        elapsed = time.perf_counter() - self._started
+        sections = dict(self.sections)
+        sections['other'] = max(elapsed - sum(sections.values()), 0.0)
+        total = sum(sections.values()) or 1.0
+        return {
+            'elapsed_seconds': round(elapsed, 6),
+            'sections': [
+                {
+                    'name': name,
+                    'seconds': round(seconds, 6),
+                    'percent': round(seconds / total * 100, 2),
+                }
+                for name, seconds in sorted(
+                    sections.items(), key=lambda item: -item[1]
+                )
+            ],
+        }
@@ -0,0 +1,114 @@
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from datasets.models import Dataset
+
+
+class GenerationCancelled(Exception):
+    """
+    Raised, when dataset stops being PROCESSED during its generation.
+    """
+
+
+class DatasetProgress:
+    """
+    Class for tracking progress of dataset's generation. Progress is saved
+    by one UPDATE query not more often than once per interval,
+    so tracking doesn't slow generation down. Every save also checks,
+    that generation hasn't been cancelled, and serves as heartbeat
+    of the running job.
+    """
+    def __init__(self, dataset_: Dataset, interval_: float = None):
+        self.dataset = dataset_
+        if interval_ is None:
+            interval_ = settings.DATASET_PROGRESS_INTERVAL
+        self.interval = interval_
+        self._started = None
+        self._first_row = 0
+        self._last_saved = None
+
+    def _save(self, **fields) -> None:
+        """
+        Save fields of dataset, which is still PROCESSED.
+        Raise GenerationCancelled, if it isn't.
+        """
+        fields['updated_at'] = timezone.now()
+        is_updated = Dataset.objects.filter(
+            pk=self.dataset.pk, status=Dataset.PROCESSED
+        ).update(**fields)
+        if not is_updated:
+            raise GenerationCancelled(
+                f'Generation of dataset {self.dataset.pk} is cancelled'
+            )
+        for name, value in fields.items():
+            setattr(self.dataset, name, value)
+
+    def start(self, first_row: int = 0) -> None:
+        """
+        Save start time of generation, which starts from the first row.
+        Progress and checkpoint are reset, if generation starts from zero.
+        """
+        self._started = self._last_saved = time.monotonic()
+        self._first_row = first_row
+        fields = {
+            'rows_written': first_row,
+            'rows_per_second': None,
+            'started_at': timezone.now(),
+            'finished_at': None,
+        }
+        if not first_row:
+            fields.update(
+                bytes_written=0, checkpoint_rows=0, checkpoint_offset=0
+            )
+        self._save(**fields)
+
+    def _get_progress_fields(self, rows_written: int,
+                             bytes_written: int) -> dict:
+        self._last_saved = time.monotonic()
+        elapsed = self._last_saved - self._started
+        rows_per_second = None
+        if elapsed:
+            rows_per_second = (rows_written - self._first_row) / elapsed
+        return {
+            'rows_written': rows_written,
+            'bytes_written': bytes_written,
+            'rows_per_second': rows_per_second,
+        }
+
+    def is_due(self) -> bool:
+        """
+        Return True, if the interval has passed since the last save.
+        """
+        return time.monotonic() - self._last_saved >= self.interval
+
+    def update(self, rows_written: int, bytes_written: int) -> bool:
+        """
+        Save number of written rows and bytes, if the interval has passed
+        since the last save. Return True, if progress has been saved.
+        """
+        if not self.is_due():
+            return False
+        self._save(**self._get_progress_fields(rows_written, bytes_written))
+        return True
+
+    def checkpoint(self, rows_written: int, offset: int) -> None:
+        """
+        Save progress together with number of rows and byte offset,
+        which are flushed to disk, so generation can be resumed from them.
+        """
+        self._save(
+            checkpoint_rows=rows_written,
+            checkpoint_offset=offset,
+            **self._get_progress_fields(rows_written, offset)
+        )
+
+    def finish(self, rows_written: int, bytes_written: int) -> None:
+        """
+        Save final progress and finish time of generation.
+        """
+        self._save(
+            finished_at=timezone.now(),
+            **self._get_progress_fields(rows_written, bytes_written)
+        )
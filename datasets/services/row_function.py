@@ -0,0 +1,97 @@
+from collections import OrderedDict
+
+from django.conf import settings
+
+from datasets.services.column_data_generator import (
+    IntColumnDataGenerator, JobColumnDataGenerator, PooledColumnDataGenerator
+)
+
+# compiled functions of this process: {(fingerprint, seeded): function}
+_row_functions = OrderedDict()
+
+
+def _get_column_expression(index: int, generator, namespace: dict) -> tuple:
+    """
+    Return lines of local bindings and inlined expression, which builds
+    column of values. Expressions consume random stream exactly like
+    dump_batch of the generator, so output doesn't depend on the path.
+    """
+    if isinstance(generator, IntColumnDataGenerator):
+        bindings = [f'integers_{index} = rngs[{index}].integers']
+        expression = (
+            f'integers_{index}({generator.lower_bound}, '
+            f'{generator.upper_bound}, size=size, endpoint=True).tolist()'
+        )
+    elif isinstance(generator, JobColumnDataGenerator):
+        namespace[f'jobs_{index}'] = tuple(generator.JOB_CHOICES)
+        bindings = [
+            f'integers_{index} = rngs[{index}].integers',
+            f'jobs_{index}_item = jobs_{index}.__getitem__',
+        ]
+        expression = (
+            f'list(map(jobs_{index}_item, integers_{index}('
+            f'0, {len(generator.JOB_CHOICES)}, size=size).tolist()))'
+        )
+    elif isinstance(generator, PooledColumnDataGenerator):
+        namespace[f'pool_{index}'] = tuple(generator.pool.tolist())
+        bindings = [
+            f'integers_{index} = rngs[{index}].integers',
+            f'pool_{index}_item = pool_{index}.__getitem__',
+        ]
+        expression = (
+            f'list(map(pool_{index}_item, integers_{index}('
+            f'0, {generator.cardinality}, size=size).tolist()))'
+        )
+    else:
+        namespace[f'dump_batch_{index}'] = generator.dump_batch
+        bindings = []
+        expression = f'dump_batch_{index}(size, rngs[{index}])'
+    return bindings, expression
+
+
+def compile_row_function(generators, row_format: str):
+    """
+    Return generated function 'format_chunk(size, rngs)', which builds
+    every column by inlined expression and returns list with text of
+    every row, formatted by the row format of the sink.
+    """
+    if not generators:
+        return None
+
+    namespace = {'row_format': row_format.format}
+    lines = ['def format_chunk(size, rngs):']
+    columns = []
+    for index, generator in enumerate(generators):
+        bindings, expression = _get_column_expression(
+            index, generator, namespace
+        )
+        lines.extend(f'    {binding}' for binding in bindings)
+        lines.append(f'    column_{index} = {expression}')
+        columns.append(f'column_{index}')
+    lines.append(
+        '    return list(map(row_format, ' + ', '.join(columns) + '))'
+    )
+
+    source = '\n'.join(lines) + '\n'
+    exec(compile(source, '<row function>', 'exec'), namespace)
+    format_chunk = namespace['format_chunk']
+    format_chunk.source = source
+    return format_chunk
+
+
+def get_row_function(fingerprint: str, seeded: bool, generators,
+                     row_format: str):
+    """
+    Return compiled row function for fingerprint of schema columns
+    and row format from memory of the process or compile it on miss.
+    """
+    key = (fingerprint, seeded)
+    if key in _row_functions:
+        _row_functions.move_to_end(key)
+        return _row_functions[key]
+
+    row_function = compile_row_function(generators, row_format)
+    _row_functions[key] = row_function
+    while len(_row_functions) > settings.ROW_PLAN_LOCAL_CACHE_SIZE:
+        _row_functions.popitem(last=False)
+    return row_function
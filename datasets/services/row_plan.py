@@ -0,0 +1,111 @@
+import datetime
+from collections import OrderedDict
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from datasets.models import Schema, DateColumnField
+from datasets.services.column_data_generator import (
+    PooledColumnDataGenerator
+)
+from datasets.services.dataset_cache import get_columns_description
+
+# seeded dates are generated before this date instead of current moment
+SEEDED_REFERENCE_DATE = datetime.datetime(2023, 1, 1)
+
+# compiled plans of this process: {schema pk: (version, plan)}
+_local_plans = OrderedDict()
+
+
+class RowPlan(NamedTuple):
+    """
+    Immutable compiled plan of schema's row: header, description of columns
+    and pre-built data generators for unseeded and seeded generation.
+    """
+    header: tuple
+    columns: tuple
+    generators: tuple
+    seeded_generators: tuple
+
+
+def compile_row_plan(schema: Schema) -> RowPlan:
+    """
+    Load ordered fields of the schema and build plan of its row.
+    """
+    header, fields = schema.get_header_and_fields()
+    generators = []
+    seeded_generators = []
+    for field in fields:
+        generator = field.get_data_generator()
+        if isinstance(field, DateColumnField):
+            seeded_generator = field.get_data_generator(
+                SEEDED_REFERENCE_DATE
+            )
+        else:
+            seeded_generator = generator
+        if field.is_pooled:
+            # pool doesn't depend on seed, so one generator serves both
+            generator = seeded_generator = PooledColumnDataGenerator(
+                generator, field.cardinality, pool_key_=field.order
+            )
+        generators.append(generator)
+        seeded_generators.append(seeded_generator)
+
+    return RowPlan(
+        header=tuple(header),
+        columns=tuple(get_columns_description(fields)),
+        generators=tuple(generators),
+        seeded_generators=tuple(seeded_generators)
+    )
+
+
+def _get_version(schema: Schema) -> str:
+    """
+    Return version of the schema's plan. Schema.updated_at is touched
+    on every change of schema columns, so it covers columns as well.
+    It's read from database by one indexed query, because the instance
+    may be loaded before the change (or changed in another process).
+    """
+    return Schema.objects.filter(pk=schema.pk).values_list(
+        'updated_at', flat=True
+    ).get().isoformat()
+
+
+def _get_cache_key(schema_pk: int, version: str) -> str:
+    return f'row_plan:{schema_pk}:{version}'
+
+
+def get_row_plan(schema: Schema) -> RowPlan:
+    """
+    Return compiled plan of schema's row. Plan is looked up in the memory
+    of the process, then in django cache and compiled only on miss.
+    Only version of the plan is queried on hit.
+    """
+    version = _get_version(schema)
+    local_version, plan = _local_plans.get(schema.pk, (None, None))
+    if local_version == version:
+        _local_plans.move_to_end(schema.pk)
+        return plan
+
+    cache_key = _get_cache_key(schema.pk, version)
+    plan = cache.get(cache_key)
+    if plan is None:
+        plan = compile_row_plan(schema)
+        cache.set(cache_key, plan, settings.ROW_PLAN_CACHE_TIMEOUT)
+
+    _local_plans[schema.pk] = (version, plan)
+    _local_plans.move_to_end(schema.pk)
+    while len(_local_plans) > settings.ROW_PLAN_LOCAL_CACHE_SIZE:
+        _local_plans.popitem(last=False)
+    return plan
+
+
+def invalidate_row_plan(schema_pk: int, version: str = None) -> None:
+    """
+    Drop compiled plan of the schema from memory of the process
+    and from django cache.
+    """
+    local_version, plan = _local_plans.pop(schema_pk, (None, None))
+    for item in {version, local_version} - {None}:
+        cache.delete(_get_cache_key(schema_pk, item))
@@ -0,0 +1,178 @@
+from collections import defaultdict
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from datasets.models import Schema, SchemaColumn
+from datasets.services.row_plan import invalidate_row_plan
+
+
+class SchemaOwnershipError(Exception):
+    """
+    Raised, when schema with the same name belongs to another user.
+    """
+
+
+class _RawRows:
+    """
+    Queries, which insert and delete table rows of the model directly,
+    without its parents, children and signals.
+    Django has no public API for them, so this is the only place, which
+    uses private QuerySet._insert and QuerySet._raw_delete (the same
+    methods save() and delete() use). Check it on Django upgrades.
+    """
+    @staticmethod
+    def insert(model, objs: list, fields: list, using: str,
+               returning_fields: list = None) -> list:
+        """
+        Insert table rows of the model for objects by batches,
+        which fit into limits of the database.
+        Return list with values of returning fields of inserted rows.
+        """
+        connection = connections[using]
+        batch_size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+        rows = []
+        for start in range(0, len(objs), batch_size):
+            rows.extend(model._base_manager.using(using)._insert(
+                objs[start:start + batch_size], fields=fields,
+                returning_fields=returning_fields, using=using
+            ) or [])
+        return rows
+
+    @staticmethod
+    def delete(queryset, using: str) -> None:
+        """
+        Delete table rows of the queryset by one query.
+        """
+        queryset._raw_delete(using)
+
+
+def _can_return_rows(using: str) -> bool:
+    """
+    Return True, if bulk insert returns primary keys of inserted rows.
+    """
+    return connections[using].features.can_return_rows_from_bulk_insert
+
+
+def bulk_create_columns(columns: list) -> None:
+    """
+    Insert unsaved columns (instances of SchemaColumn subclasses)
+    of already saved schemas. Multi-table inheritance isn't supported
+    by bulk_create, so table rows are inserted the same way as save()
+    does it, but by batches: SchemaColumn rows of all columns at once,
+    then rows of subclasses grouped by concrete type.
+    Columns are inserted without post_save signals.
+    """
+    if not columns:
+        return
+    using = router.db_for_write(SchemaColumn)
+    if not _can_return_rows(using):
+        # primary keys of parents are needed for rows of subclasses
+        for column in columns:
+            column.save(using=using)
+        return
+
+    meta = SchemaColumn._meta
+    rows = _RawRows.insert(
+        SchemaColumn, columns,
+        [field for field in meta.local_concrete_fields
+         if field is not meta.auto_field],
+        using, meta.db_returning_fields
+    )
+    columns_by_class = defaultdict(list)
+    for column, (pk, ) in zip(columns, rows):
+        column.id = pk
+        column.pk = pk
+        column._state.adding = False
+        column._state.db = using
+        columns_by_class[type(column)].append(column)
+    for column_class, class_columns in columns_by_class.items():
+        _RawRows.insert(
+            column_class, class_columns,
+            column_class._meta.local_concrete_fields, using
+        )
+
+
+def _delete_columns(schemas: list) -> None:
+    """
+    Delete all columns of schemas by one query per table,
+    without loading columns and sending their delete signals.
+    """
+    using = router.db_for_write(SchemaColumn)
+    column_classes = [
+        related.related_model
+        for related in SchemaColumn._meta.related_objects
+        if related.parent_link
+    ]
+    for column_class in column_classes + [SchemaColumn]:
+        _RawRows.delete(
+            column_class.objects.using(using).filter(schema__in=schemas),
+            using
+        )
+
+
+def save_schemas(author, schemas: list) -> list:
+    """
+    Create or replace schemas of the author in one transaction.
+    Every item is (unsaved schema, list of its unsaved columns);
+    existing schema with the same name gets new attributes and
+    its columns are replaced. Return list of (schema, is_created).
+    Raise SchemaOwnershipError, if the name is taken by another author.
+    """
+    names = [schema.name for schema, _ in schemas]
+    with transaction.atomic():
+        existing = {
+            schema.name: schema
+            for schema in Schema.objects.select_for_update().filter(
+                name__in=names
+            )
+        }
+        foreign = sorted(
+            name for name, schema in existing.items()
+            if schema.author_id != author.pk
+        )
+        if foreign:
+            raise SchemaOwnershipError(
+                f'Schemas belong to another user: {", ".join(foreign)}'
+            )
+
+        now = timezone.now()
+        created = []
+        replaced = []
+        results = []
+        for schema, _ in schemas:
+            current = existing.get(schema.name)
+            if current is None:
+                schema.author = author
+                created.append(schema)
+                results.append((schema, True))
+            else:
+                current.separator = schema.separator
+                current.quote_type = schema.quote_type
+                current.updated_at = now
+                replaced.append(current)
+                results.append((current, False))
+
+        using = router.db_for_write(Schema)
+        if _can_return_rows(using):
+            Schema.objects.using(using).bulk_create(created)
+        else:
+            # primary keys of schemas are needed for their columns
+            for schema in created:
+                schema.save(using=using)
+        if replaced:
+            _delete_columns(replaced)
+            Schema.objects.bulk_update(
+                replaced, ['separator', 'quote_type', 'updated_at']
+            )
+
+        columns = []
+        for (_, schema_columns), (saved_schema, _) in zip(schemas, results):
+            for column in schema_columns:
+                column.schema = saved_schema
+                columns.append(column)
+        bulk_create_columns(columns)
+
+    for schema in replaced:
+        invalidate_row_plan(schema.pk)
+    return results
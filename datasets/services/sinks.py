@@ -0,0 +1,418 @@
+import csv
+import json
+
+from django.conf import settings
+
+from datasets.models import Schema, Dataset
+from datasets.services.column_data_generator import (
+    IntColumnDataGenerator, PooledColumnDataGenerator
+)
+from datasets.services.dataset_cache import get_fingerprint
+from datasets.services.parquet_writer import (
+    pa, get_arrow_schema, build_arrow_column, build_arrow_pool,
+    open_parquet_writer
+)
+from datasets.services.row_function import get_row_function
+
+
+def _cut_block(values, block):
+    """
+    Return values of the random block, which belong to the chunk.
+    """
+    if block.start == 0 and block.stop == block.size:
+        return values
+    return values[block.start:block.stop]
+
+
+class DatasetSink:
+    """
+    Base class for output sink, which serializes chunks of generated
+    columns into dataset file. Chunk is given as list of random blocks
+    (size, random streams of columns and rows of the chunk in the block).
+    Text sinks write into text stream, which may compress written text,
+    and their chunks may be written by parallel shards. Binary sinks
+    write into binary file sequentially.
+    """
+    extension = ''
+    content_type = 'application/octet-stream'
+    is_binary = False
+
+    def __init__(self, schema_: Schema, plan_, seeded_: bool = False,
+                 compression_: str = Dataset.NO_COMPRESSION,
+                 compression_level_: int = None):
+        self.schema = schema_
+        self.plan = plan_
+        self.seeded = seeded_
+        self.compression = compression_
+        self.compression_level = compression_level_
+
+    def write_header(self, file) -> None:
+        """
+        Write data, which precedes the rows.
+        """
+
+    def generate_column(self, generator, index: int, size: int, rng):
+        """
+        Return 'size' values of the column with index by its generator.
+        """
+        return generator.dump_batch(size, rng)
+
+    def join_values(self, parts: list):
+        """
+        Return values of the column, joined from parts of the blocks.
+        """
+        if len(parts) == 1:
+            return parts[0]
+        values = []
+        for part in parts:
+            values.extend(part)
+        return values
+
+    def generate_chunk_column(self, generator, index: int, blocks: list):
+        """
+        Return values of the column with index in all blocks of the chunk.
+        """
+        return self.join_values([
+            _cut_block(
+                self.generate_column(
+                    generator, index, block.size, block.rngs[index]
+                ),
+                block
+            )
+            for block in blocks
+        ])
+
+    def write_columns(self, file, generators, columns: list) -> None:
+        """
+        Serialize generated columns of the chunk and write them.
+        """
+        raise NotImplementedError
+
+    def write_chunk(self, file, generators, blocks: list) -> None:
+        """
+        Generate chunk of rows by data generators and write it.
+        """
+        self.write_columns(file, generators, [
+            self.generate_chunk_column(generator, index, blocks)
+            for index, generator in enumerate(generators)
+        ])
+
+    def write_footer(self, file) -> None:
+        """
+        Write data, which follows the rows.
+        """
+
+
+class TextSink(DatasetSink):
+    """
+    Base class for text sinks, which format every row by one format string.
+    If values of every column can be put into the format without escaping,
+    chunks are formatted by compiled row function (fast path), otherwise
+    values are generated by data generators and escaped (fallback).
+    """
+    def get_row_format(self, generators):
+        """
+        Return format string of the row for values without escaping
+        or None, if some values may need escaping.
+        """
+        raise NotImplementedError
+
+    def get_fallback_format(self) -> str:
+        """
+        Return format string of the row for escaped values.
+        """
+        raise NotImplementedError
+
+    def encode_column(self, generator, values) -> list:
+        """
+        Return list with escaped values of the column.
+        """
+        return values
+
+    def get_row_function(self, generators):
+        """
+        Return compiled function for formatting chunks of the schema
+        or None, if fallback must be used.
+        """
+        if not settings.DATASET_ROW_FUNCTIONS_ENABLED:
+            return None
+        row_format = self.get_row_format(generators)
+        if row_format is None:
+            return None
+        fingerprint = get_fingerprint(
+            columns=self.plan.columns,
+            row_format=row_format
+        )
+        return get_row_function(
+            fingerprint, self.seeded, generators, row_format
+        )
+
+    def write_chunk(self, file, generators, blocks: list) -> None:
+        row_function = self.get_row_function(generators)
+        if row_function is None:
+            super().write_chunk(file, generators, blocks)
+        else:
+            self.write_rows(file, self.join_values([
+                _cut_block(row_function(block.size, block.rngs), block)
+                for block in blocks
+            ]))
+
+    def write_columns(self, file, generators, columns: list) -> None:
+        """
+        Write generated columns as rows. Values are put into the row
+        format as they are, if row functions are enabled and values
+        don't need escaping, otherwise they are escaped.
+        """
+        row_format = None
+        if settings.DATASET_ROW_FUNCTIONS_ENABLED:
+            row_format = self.get_row_format(generators)
+        if row_format is None:
+            self.write_escaped_columns(file, generators, columns)
+        else:
+            self.write_rows(file, list(map(row_format.format, *columns)))
+
+    def write_escaped_columns(self, file, generators,
+                              columns: list) -> None:
+        """
+        Escape values of generated columns and write them as rows.
+        """
+        columns = [
+            self.encode_column(generator, values)
+            for generator, values in zip(generators, columns)
+        ]
+        self.write_rows(
+            file, list(map(self.get_fallback_format().format, *columns))
+        )
+
+    def write_rows(self, file, rows: list) -> None:
+        """
+        Write list with formatted rows.
+        """
+        file.write(''.join(rows))
+
+
+class CsvSink(TextSink):
+    """
+    Sink for csv file with schema's separator and quote type.
+    Row format quotes columns the same way as csv.writer with minimal
+    quoting, csv.writer is used as fallback.
+    """
+    extension = '.csv'
+    content_type = 'text/csv'
+    # csv.writer ends every row with this line terminator by default
+    LINE_TERMINATOR = '\r\n'
+
+    @property
+    def separator(self) -> str:
+        return self.schema.separator
+
+    @property
+    def quote_type(self) -> str:
+        return self.schema.quote_type
+
+    def _get_writer(self, file):
+        """
+        Return csv writer with sink's separator and quote type.
+        """
+        return csv.writer(
+            file,
+            delimiter=self.separator,
+            quotechar=self.quote_type
+        )
+
+    def write_header(self, file) -> None:
+        self._get_writer(file).writerow(self.plan.header)
+
+    def get_row_format(self, generators):
+        separator = self.separator
+        quote_type = self.quote_type
+        column_formats = []
+        for generator in generators:
+            possible, required = generator.get_characters()
+            if quote_type in possible or '\r' in possible \
+                    or '\n' in possible:
+                return None
+            if separator in required:
+                column_formats.append(f'{quote_type}{{}}{quote_type}')
+            elif separator in possible:
+                return None
+            else:
+                column_formats.append('{}')
+        return separator.join(column_formats) + self.LINE_TERMINATOR
+
+    def write_escaped_columns(self, file, generators,
+                              columns: list) -> None:
+        self._get_writer(file).writerows(zip(*columns))
+
+
+class TsvSink(CsvSink):
+    """
+    Sink for tab-separated file.
+    """
+    extension = '.tsv'
+    content_type = 'text/tab-separated-values'
+
+    @property
+    def separator(self) -> str:
+        return '\t'
+
+
+class JsonLinesSink(TextSink):
+    """
+    Sink for JSON Lines file with object for every row. Keys are encoded
+    once into the row format, integers are written as numbers and other
+    values as strings.
+    """
+    extension = '.jsonl'
+    content_type = 'application/x-ndjson'
+
+    def _get_format(self, value_formats) -> str:
+        items = [
+            json.dumps(name).replace('{', '{{').replace('}', '}}')
+            + ': ' + value_format
+            for name, value_format in zip(self.plan.header, value_formats)
+        ]
+        return '{{' + ', '.join(items) + '}}\n'
+
+    def get_row_format(self, generators):
+        value_formats = []
+        for generator in generators:
+            if isinstance(generator, IntColumnDataGenerator):
+                value_formats.append('{}')
+                continue
+            possible, _ = generator.get_characters()
+            if any(char in '"\\' or not ' ' <= char <= '~'
+                   for char in possible):
+                return None
+            value_formats.append('"{}"')
+        return self._get_format(value_formats)
+
+    def get_fallback_format(self) -> str:
+        return self._get_format(['{}'] * len(self.plan.header))
+
+    def encode_column(self, generator, values) -> list:
+        if isinstance(generator, IntColumnDataGenerator):
+            return values
+        return [json.dumps(str(value)) for value in values]
+
+
+class SqlInsertSink(TextSink):
+    """
+    Sink for SQL script with INSERT statements into the table named after
+    the schema. Every statement inserts multiple rows by one VALUES list.
+    """
+    extension = '.sql'
+    content_type = 'application/sql'
+    ROWS_PER_STATEMENT = 1000
+
+    @staticmethod
+    def _quote_identifier(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def _get_statement_prefix(self) -> str:
+        columns = ', '.join(map(self._quote_identifier, self.plan.header))
+        return (
+            f'INSERT INTO {self._quote_identifier(self.schema.name)} '
+            f'({columns}) VALUES\n'
+        )
+
+    def get_row_format(self, generators):
+        value_formats = []
+        for generator in generators:
+            if isinstance(generator, IntColumnDataGenerator):
+                value_formats.append('{}')
+                continue
+            possible, _ = generator.get_characters()
+            if "'" in possible or '\\' in possible:
+                return None
+            value_formats.append("'{}'")
+        return '(' + ', '.join(value_formats) + ')'
+
+    def get_fallback_format(self) -> str:
+        return '(' + ', '.join(['{}'] * len(self.plan.header)) + ')'
+
+    def encode_column(self, generator, values) -> list:
+        if isinstance(generator, IntColumnDataGenerator):
+            return values
+        return [
+            "'" + str(value).replace("'", "''") + "'" for value in values
+        ]
+
+    def write_rows(self, file, rows: list) -> None:
+        prefix = self._get_statement_prefix()
+        for start in range(0, len(rows), self.ROWS_PER_STATEMENT):
+            file.write(
+                prefix
+                + ',\n'.join(rows[start:start + self.ROWS_PER_STATEMENT])
+                + ';\n'
+            )
+
+
+class ParquetSink(DatasetSink):
+    """
+    Sink for parquet file. Every chunk is built as typed arrow columns
+    and written as separate row group, so memory doesn't depend
+    on number of rows. Pooled columns are written as dictionaries,
+    arrow arrays of pools are built once for the file.
+    """
+    extension = '.parquet'
+    content_type = 'application/vnd.apache.parquet'
+    is_binary = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._arrow_schema = None
+        self._writer = None
+        # {column index: arrow array with values of the pool}
+        self._arrow_pools = {}
+
+    def write_header(self, file) -> None:
+        self._arrow_schema = get_arrow_schema(
+            self.plan.header, self.plan.columns
+        )
+        self._writer = open_parquet_writer(
+            file, self._arrow_schema, self.compression,
+            self.compression_level
+        )
+
+    def generate_column(self, generator, index: int, size: int, rng):
+        arrow_pool = None
+        if isinstance(generator, PooledColumnDataGenerator):
+            arrow_pool = self._arrow_pools.get(index)
+            if arrow_pool is None:
+                arrow_pool = build_arrow_pool(generator)
+                self._arrow_pools[index] = arrow_pool
+        return build_arrow_column(
+            generator, self._arrow_schema.types[index], size, rng, arrow_pool
+        )
+
+    def join_values(self, parts: list):
+        if len(parts) == 1:
+            return parts[0]
+        return pa.concat_arrays(parts)
+
+    def write_columns(self, file, generators, columns: list) -> None:
+        self._writer.write_batch(
+            pa.record_batch(columns, schema=self._arrow_schema)
+        )
+
+    def write_footer(self, file) -> None:
+        self._writer.close()
+        self._writer = None
+
+
+# {dataset file format: sink class}
+SINK_CLASSES = {
+    Dataset.CSV: CsvSink,
+    Dataset.TSV: TsvSink,
+    Dataset.JSONL: JsonLinesSink,
+    Dataset.SQL: SqlInsertSink,
+    Dataset.PARQUET: ParquetSink,
+}
+
+
+def get_sink_class(file_format: str):
+    """
+    Return class of the sink for dataset file format.
+    """
+    return SINK_CLASSES[file_format]
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from datasets.models import Schema, SchemaColumn
+from datasets.services.row_plan import invalidate_row_plan
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def schema_column_changed(sender, instance, **kwargs):
+    """
+    Touch schema of changed column, so compiled row plans of the schema
+    become outdated in every process, and drop plan of this process.
+    Signals are sent with column subclasses as senders,
+    so they are filtered by instance.
+    """
+    if not isinstance(instance, SchemaColumn):
+        return
+    Schema.objects.filter(pk=instance.schema_id).update(
+        updated_at=timezone.now()
+    )
+    invalidate_row_plan(instance.schema_id)
+
+
+@receiver(post_save, sender=Schema)
+@receiver(post_delete, sender=Schema)
+def schema_changed(sender, instance, **kwargs):
+    """
+    Drop compiled row plan of changed schema.
+    """
+    invalidate_row_plan(instance.pk)
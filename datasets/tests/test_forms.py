@@ -1,8 +1,10 @@
 import unittest
+from unittest import mock
 from ddt import ddt, data, unpack
 
-from datasets.models import SchemaColumn
-from datasets.forms import SchemaColumnForm
+from datasets.models import SchemaColumn, Dataset
+from datasets.forms import SchemaColumnForm, DatasetGeneratorForm
+from datasets.services.parquet_writer import is_parquet_available
 
 
 @ddt
@@ -66,6 +68,81 @@ class SchemaColumnFormTestCase(unittest.TestCase):
         form = SchemaColumnForm(data=form_data)
         self.assertFalse(form.is_valid())
 
+    @data(
+        (1, True),
+        (0, False),
+        (-1, False),
+    )
+    @unpack
+    def test_number_of_sentences(self, number_of_sentences, is_valid):
+        form_data = {
+            'order': 1,
+            'name': 'test',
+            'field_type': SchemaColumn.TEXT,
+            'number_of_sentences': number_of_sentences,
+        }
+        form = SchemaColumnForm(data=form_data)
+        self.assertEqual(form.is_valid(), is_valid)
 
+    @data(
+        (1, True),
+        (SchemaColumn.MAX_CARDINALITY, True),
+        (0, False),
+        (SchemaColumn.MAX_CARDINALITY + 1, False),
+    )
+    @unpack
+    def test_cardinality(self, cardinality, is_valid):
+        form_data = {
+            'order': 1,
+            'name': 'test',
+            'field_type': SchemaColumn.FULLNAME,
+            'cardinality': cardinality,
+        }
+        form = SchemaColumnForm(data=form_data)
+        self.assertEqual(form.is_valid(), is_valid)
 
 
+@ddt
+class DatasetGeneratorFormTestCase(unittest.TestCase):
+    @data(
+        ('', None, True),
+        (Dataset.NO_COMPRESSION, None, True),
+        (Dataset.GZIP, 9, True),
+        (Dataset.GZIP, 10, False),
+        ('BZIP2', None, False),
+    )
+    @unpack
+    def test_compression(self, compression, level, is_valid):
+        form_data = {
+            'num_rows': 10,
+            'compression': compression,
+            'compression_level': level,
+        }
+        form = DatasetGeneratorForm(data=form_data)
+        self.assertEqual(form.is_valid(), is_valid)
+
+    @data(
+        (1, True),
+        (0, False),
+        (-5, False),
+    )
+    @unpack
+    def test_num_rows(self, num_rows, is_valid):
+        form = DatasetGeneratorForm(data={'num_rows': num_rows})
+        self.assertEqual(form.is_valid(), is_valid)
+
+    @data(
+        (Dataset.CSV, False),
+        (Dataset.PARQUET, True),
+    )
+    @unpack
+    @unittest.skipUnless(is_parquet_available(), 'pyarrow is not installed')
+    def test_zstd_without_zstandard(self, file_format, is_valid):
+        form_data = {
+            'num_rows': 10,
+            'file_format': file_format,
+            'compression': Dataset.ZSTD,
+        }
+        with mock.patch('datasets.services.compression.zstandard', None):
+            form = DatasetGeneratorForm(data=form_data)
+            self.assertEqual(form.is_valid(), is_valid)
@@ -256,4 +256,57 @@ class SchemaColumnTests(TestCase):
         self.assertEqual(column.generate_dump_value(), 'sample.ua')
 
 
+class SchemaFieldsLoaderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Create instances before ALL tests of this TestCase"""
+        cls.author = get_user_model().objects.create(
+            username='test',
+            password='test_pwd'
+        )
+
+        cls.schema = Schema.objects.create(
+            name='global_schema',
+            separator=Schema.SPACE,
+            quote_type=Schema.SINGLE_QUOTE,
+            author=cls.author
+        )
+        TextColumnField.objects.create(
+            order=3,
+            name='Text',
+            field_type=TextColumnField.TEXT,
+            number_of_sentences=2,
+            schema=cls.schema
+        )
+        IntegerColumnField.objects.create(
+            order=1,
+            name='Integer',
+            field_type=IntegerColumnField.RANGED_INT,
+            lower_bound=0,
+            upper_bound=10,
+            schema=cls.schema
+        )
+        JobColumnField.objects.create(
+            order=2,
+            name='Job',
+            field_type=JobColumnField.JOB,
+            schema=cls.schema
+        )
+
+    def test_header_and_fields_in_one_query(self):
+        with self.assertNumQueries(1):
+            header, fields = self.schema.get_header_and_fields()
 
+        self.assertEqual(header, ['Integer', 'Job', 'Text'])
+        self.assertEqual(
+            [type(field) for field in fields],
+            [IntegerColumnField, JobColumnField, TextColumnField]
+        )
+        self.assertEqual(fields[0].upper_bound, 10)
+        self.assertEqual(fields[2].number_of_sentences, 2)
+
+    def test_ordered_fields(self):
+        self.assertEqual(
+            [field.name for field in self.schema.ordered_fields],
+            self.schema.get_header()
+        )
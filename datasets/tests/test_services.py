@@ -1,9 +1,50 @@
+import io
+import os
+import csv
+import gzip
+import json
+import re
+import sqlite3
 import unittest
 import datetime
+import tempfile
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from django.http import FileResponse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from datasets.models import (
+    Schema, SchemaColumn, Dataset, DatasetJob, DatasetCacheEntry,
+    IntegerColumnField,
+    JobColumnField, TextColumnField, DateColumnField, PhoneColumnField,
+    FullNameColumnField, CompanyColumnField
+)
 from datasets.services.column_data_generator import (
     IntColumnDataGenerator, StringColumnDataGenerator, DateColumnDataGenerator,
-    JobColumnDataGenerator, PhoneColumnDataGenerator
+    JobColumnDataGenerator, PhoneColumnDataGenerator,
+    FormattedStringColumnDataGenerator, PooledColumnDataGenerator
 )
+from datasets.services.csv_writer import CsvGenerator, SpoolFile
+from datasets.services.job_queue import (
+    enqueue_dataset, claim_next_job, run_job, cancel_dataset
+)
+from datasets.services.row_plan import get_row_plan
+from datasets.services.dataset_cache import DatasetCache
+from datasets.services.benchmark import compare_reports
+from datasets.services.compression import zstandard
+from datasets.services.parquet_writer import pa, pq
+from datasets.services.progress import DatasetProgress
+from datasets.services.metrics import get_schema_width
+from datasets.services.pagination import paginate_by_keyset
+from prometheus_client import REGISTRY
 
 
 class TestColumnDataGenerator(unittest.TestCase):
@@ -71,6 +112,18 @@ class TestColumnDataGenerator(unittest.TestCase):
         for item in generated_data:
             self.assertIsInstance(item, datetime.datetime)
 
+    def test_date_data_generator_reference_date(self):
+        reference_date = datetime.datetime(2020, 1, 1)
+        date_generator = DateColumnDataGenerator(reference_date)
+
+        generated_data = date_generator.dump_batch(self.NUMBER_OF_TRIES)
+
+        for item in generated_data:
+            self.assertLessEqual(item, reference_date)
+            self.assertGreaterEqual(
+                item, reference_date - datetime.timedelta(days=365 * 10)
+            )
+
     def test_phone_data_generator(self):
         phone_generator = PhoneColumnDataGenerator()
 
@@ -84,3 +137,1676 @@ class TestColumnDataGenerator(unittest.TestCase):
             self.assertEqual(len(item), 13)
             self.assertEqual(item[:4], '+380')
             self.assertTrue(item[1:].isdigit())
+
+    def test_batch_data_generators(self):
+        generators = [
+            (IntColumnDataGenerator(-10, 10), int),
+            (StringColumnDataGenerator(5, 50), str),
+            (JobColumnDataGenerator(), str),
+            (DateColumnDataGenerator(), datetime.datetime),
+            (PhoneColumnDataGenerator(), str),
+        ]
+
+        for generator, value_type in generators:
+            generated_data = generator.dump_batch(self.NUMBER_OF_TRIES)
+
+            self.assertEqual(len(generated_data), self.NUMBER_OF_TRIES)
+            for item in generated_data:
+                self.assertIsInstance(item, value_type)
+
+            self.assertEqual(generator.dump_batch(0), [])
+
+    def test_string_batch_data_generator(self):
+        min_length = 5
+        max_length = 50
+        str_generator = StringColumnDataGenerator(min_length, max_length)
+
+        generated_data = str_generator.dump_batch(self.NUMBER_OF_TRIES)
+
+        for item in generated_data:
+            self.assertGreaterEqual(len(item), min_length)
+            self.assertLessEqual(len(item), max_length)
+            self.assertTrue(item.isalpha() and item.islower())
+
+    def test_pooled_data_generator(self):
+        str_generator = FormattedStringColumnDataGenerator(
+            5, 10, words_number_=2, capitalize_=True
+        )
+        pooled_generator = PooledColumnDataGenerator(str_generator, 20)
+
+        generated_data = pooled_generator.dump_batch(self.NUMBER_OF_TRIES)
+        pool = pooled_generator.pool.tolist()
+
+        self.assertEqual(len(generated_data), self.NUMBER_OF_TRIES)
+        self.assertEqual(len(set(pool)), 20)
+        self.assertLessEqual(set(generated_data), set(pool))
+        # pool doesn't depend on process and seed
+        self.assertEqual(
+            PooledColumnDataGenerator(str_generator, 20).pool.tolist(), pool
+        )
+        # but it depends on the column
+        self.assertNotEqual(
+            PooledColumnDataGenerator(
+                str_generator, 20, pool_key_=1
+            ).pool.tolist(),
+            pool
+        )
+        self.assertEqual(
+            pooled_generator.get_characters(), str_generator.get_characters()
+        )
+
+    def test_formatted_string_data_generator_without_words(self):
+        for words_number in (0, -1):
+            str_generator = FormattedStringColumnDataGenerator(
+                5, 10, template_='{}.', words_number_=words_number
+            )
+
+            self.assertEqual(str_generator.dump_batch(3), ['.'] * 3)
+
+    def test_formatted_string_data_generator(self):
+        str_generator = FormattedStringColumnDataGenerator(
+            5, 10, template_='{}.', words_number_=3, separator_='. ',
+            capitalize_=True
+        )
+
+        generated_data = str_generator.dump_batch(self.NUMBER_OF_TRIES)
+
+        self.assertEqual(len(generated_data), self.NUMBER_OF_TRIES)
+        for item in generated_data:
+            sentences = item[:-1].split('. ')
+            self.assertTrue(item.endswith('.'))
+            self.assertEqual(len(sentences), 3)
+            for sentence in sentences:
+                self.assertTrue(sentence.isalpha())
+                self.assertEqual(sentence, sentence.capitalize())
+
+
+class CsvGeneratorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Create instances before ALL tests of this TestCase"""
+        cls.author = get_user_model().objects.create(
+            username='test',
+            password='test_pwd'
+        )
+        cls.schema = Schema.objects.create(
+            name='global_schema',
+            author=cls.author
+        )
+        IntegerColumnField.objects.create(
+            order=2,
+            name='Integer',
+            field_type=IntegerColumnField.RANGED_INT,
+            lower_bound=0,
+            upper_bound=10,
+            schema=cls.schema
+        )
+        JobColumnField.objects.create(
+            order=1,
+            name='Job',
+            field_type=JobColumnField.JOB,
+            schema=cls.schema
+        )
+        TextColumnField.objects.create(
+            order=3,
+            name='Text',
+            field_type=TextColumnField.TEXT,
+            number_of_sentences=2,
+            schema=cls.schema
+        )
+
+    def test_chunks_are_written_by_sink(self):
+        csv_generator = CsvGenerator(self.schema, 10, chunk_size_=3)
+        buffer = io.StringIO()
+
+        sizes = list(csv_generator._write_chunks(
+            buffer, csv_generator._get_generators()
+        ))
+        rows = list(csv.reader(io.StringIO(buffer.getvalue())))
+
+        self.assertEqual(sizes, [3, 3, 3, 1])
+        self.assertEqual(len(rows), 10)
+        for job, integer, text in rows:
+            self.assertIn(job, JobColumnDataGenerator.JOB_CHOICES)
+            self.assertGreaterEqual(int(integer), 0)
+            self.assertLessEqual(int(integer), 10)
+            self.assertEqual(text.count('. '), 1)
+
+    def test_shards_cover_whole_chunks(self):
+        csv_generator = CsvGenerator(
+            self.schema, 25, chunk_size_=4, processes_=3
+        )
+
+        self.assertEqual(
+            csv_generator._get_shards(), [(0, 12), (12, 8), (20, 5)]
+        )
+
+    def test_parallel_generate_dataset(self):
+        csv_generator = CsvGenerator(
+            self.schema, 25, chunk_size_=4, processes_=3
+        )
+
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                dataset = csv_generator.generate_dataset()
+                with dataset.file.open('r') as f:
+                    lines = f.read().splitlines()
+
+        self.assertEqual(dataset.status, Dataset.READY)
+        self.assertEqual(len(lines), 26)
+        self.assertEqual(lines[0], 'Job,Integer,Text')
+        self.assertEqual(len(set(lines[1:])), 25)
+
+    def test_spool_file_is_moved_into_storage(self):
+        created_at = timezone.now()
+        datasets = []
+
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root), \
+                    mock.patch.object(
+                        SpoolFile, 'chunks',
+                        side_effect=AssertionError('File is copied')
+                    ):
+                for seed in (1, 2):
+                    csv_generator = CsvGenerator(self.schema, 10, seed_=seed)
+                    dataset = csv_generator.create_dataset()
+                    # both files get the same name, which must not clash
+                    Dataset.objects.filter(pk=dataset.pk).update(
+                        created_at=created_at
+                    )
+                    dataset.refresh_from_db()
+                    datasets.append(csv_generator.fill_dataset(dataset))
+                contents = []
+                for dataset in datasets:
+                    with dataset.file.open('r') as f:
+                        contents.append(f.read())
+            file_names = os.listdir(os.path.join(media_root, 'datasets'))
+
+        first, second = datasets
+        self.assertNotEqual(first.file.name, second.file.name)
+        self.assertNotEqual(contents[0], contents[1])
+        self.assertEqual(
+            sorted(file_names),
+            sorted(os.path.basename(dataset.file.name) for dataset in datasets)
+        )
+
+    def test_generation_progress(self):
+        for processes in (1, 3):
+            csv_generator = CsvGenerator(
+                self.schema, 25, chunk_size_=4, processes_=processes
+            )
+
+            with tempfile.TemporaryDirectory() as media_root:
+                with override_settings(MEDIA_ROOT=media_root,
+                                       DATASET_PROGRESS_INTERVAL=0):
+                    dataset = csv_generator.generate_dataset()
+                    dataset.refresh_from_db()
+
+                    self.assertEqual(dataset.rows_written, 25)
+                    self.assertEqual(dataset.bytes_written, dataset.file.size)
+            self.assertGreater(dataset.rows_per_second, 0)
+            self.assertLessEqual(dataset.started_at, dataset.finished_at)
+            self.assertEqual(dataset.progress, 1.0)
+            self.assertEqual(dataset.eta_seconds, 0.0)
+
+    def test_progress_updates_are_throttled(self):
+        dataset = Dataset.objects.create(schema=self.schema, num_rows=100)
+        progress = DatasetProgress(dataset, interval_=3600)
+        progress.start()
+
+        self.assertFalse(progress.update(10, 100))
+        progress.interval = 0
+        self.assertTrue(progress.update(20, 200))
+        dataset.refresh_from_db()
+
+        self.assertEqual(dataset.rows_written, 20)
+        self.assertEqual(dataset.progress, 0.2)
+        self.assertIsNone(dataset.finished_at)
+        self.assertGreater(dataset.eta_seconds, 0)
+
+    def test_stream_csv(self):
+        csv_generator = CsvGenerator(self.schema, 10, chunk_size_=4)
+
+        parts = list(csv_generator.stream_csv())
+        lines = ''.join(parts).splitlines()
+
+        self.assertEqual(parts[0], 'Job,Integer,Text\r\n')
+        self.assertEqual(len(parts), 4)
+        self.assertEqual(len(lines), 11)
+
+    def test_seeded_generation_is_reproducible(self):
+        DateColumnField.objects.create(
+            order=4,
+            name='Date',
+            field_type=DateColumnField.DATE,
+            schema=self.schema
+        )
+        contents = []
+
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                for processes in (1, 3, 3):
+                    csv_generator = CsvGenerator(
+                        self.schema, 25, chunk_size_=4,
+                        processes_=processes, seed_=42
+                    )
+                    dataset = csv_generator.generate_dataset()
+                    with dataset.file.open('rb') as f:
+                        contents.append(f.read())
+
+        self.assertEqual(dataset.seed, 42)
+        self.assertEqual(contents[0], contents[1])
+        self.assertEqual(contents[0], contents[2])
+
+    def test_seeded_data_do_not_depend_on_chunk_size(self):
+        num_rows = 2 * CsvGenerator.RNG_BLOCK_SIZE + 100
+        expected = ''.join(
+            CsvGenerator(self.schema, num_rows, seed_=5).stream_csv()
+        )
+
+        for chunk_size in (1000, CsvGenerator.RNG_BLOCK_SIZE, 5000):
+            csv_generator = CsvGenerator(
+                self.schema, num_rows, chunk_size_=chunk_size, seed_=5
+            )
+            self.assertEqual(''.join(csv_generator.stream_csv()), expected)
+            with override_settings(DATASET_ROW_FUNCTIONS_ENABLED=False):
+                self.assertEqual(
+                    ''.join(csv_generator.stream_csv()), expected
+                )
+        self.assertEqual(
+            len(list(csv.reader(io.StringIO(expected)))), num_rows + 1
+        )
+        self.assertEqual(
+            CsvGenerator(self.schema, 10, chunk_size_=3, seed_=5)
+            .get_fingerprint(),
+            CsvGenerator(self.schema, 10, seed_=5).get_fingerprint()
+        )
+
+    def _generate_content(self, **kwargs) -> tuple:
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root,
+                                   DATASET_CACHE_ENABLED=False):
+                dataset = CsvGenerator(
+                    self.schema, 25, chunk_size_=4, seed_=7, **kwargs
+                ).generate_dataset()
+                with dataset.file.open('rb') as f:
+                    return dataset, f.read()
+
+    def test_gzip_compressed_generation(self):
+        _, content = self._generate_content()
+        dataset, compressed = self._generate_content(
+            compression_=Dataset.GZIP, compression_level_=1
+        )
+        _, parallel_compressed = self._generate_content(
+            processes_=3, compression_=Dataset.GZIP, compression_level_=1
+        )
+
+        self.assertTrue(dataset.file.name.endswith('.csv.gz'))
+        self.assertEqual(dataset.compression_level, 1)
+        self.assertEqual(gzip.decompress(compressed), content)
+        self.assertEqual(gzip.decompress(parallel_compressed), content)
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd_compressed_generation(self):
+        _, content = self._generate_content()
+        dataset, compressed = self._generate_content(
+            processes_=3, compression_=Dataset.ZSTD
+        )
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            io.BytesIO(compressed), read_across_frames=True
+        )
+
+        self.assertTrue(dataset.file.name.endswith('.csv.zst'))
+        self.assertEqual(reader.read(), content)
+
+    @unittest.skipIf(pa is None, 'pyarrow is not installed')
+    def test_parquet_generation(self):
+        _, content = self._generate_content()
+        dataset, parquet = self._generate_content(
+            file_format_=Dataset.PARQUET, compression_=Dataset.ZSTD
+        )
+        parquet_file = pq.ParquetFile(io.BytesIO(parquet))
+        table = parquet_file.read()
+        rows = list(csv.reader(io.StringIO(content.decode('utf8'))))[1:]
+
+        self.assertTrue(dataset.file.name.endswith('.parquet'))
+        self.assertEqual(parquet_file.metadata.num_row_groups, 7)
+        self.assertEqual(table.column_names, ['Job', 'Integer', 'Text'])
+        self.assertTrue(
+            pa.types.is_dictionary(table.schema.field('Job').type)
+        )
+        self.assertEqual(table.schema.field('Integer').type, pa.int64())
+        self.assertEqual(
+            [list(row) for row in zip(*table.to_pydict().values())],
+            [[job, int(integer), text] for job, integer, text in rows]
+        )
+
+    def test_profiled_generation(self):
+        _, content = self._generate_content()
+        dataset, profiled = self._generate_content(profile_=True)
+        parallel_dataset, parallel_profiled = self._generate_content(
+            processes_=3, profile_=True
+        )
+        dataset.refresh_from_db()
+        parallel_report = parallel_dataset.profile
+        sections = {
+            section['name']: section for section in dataset.profile['sections']
+        }
+
+        self.assertEqual(profiled, content)
+        self.assertEqual(parallel_profiled, content)
+        self.assertEqual(set(sections), {
+            'column Job (JOB)', 'column Integer (RANGED_INT)',
+            'column Text (TEXT)', 'serialization', 'file_io', 'file_save',
+            'other'
+        })
+        self.assertAlmostEqual(
+            sum(section['percent'] for section in sections.values()), 100,
+            delta=0.1
+        )
+        # worker sections are averaged, so nothing exceeds wall-clock time
+        self.assertGreater(
+            next(
+                section['seconds'] for section in parallel_report['sections']
+                if section['name'] == 'other'
+            ),
+            0
+        )
+        self.assertAlmostEqual(
+            sum(
+                section['seconds'] for section in parallel_report['sections']
+            ),
+            parallel_report['elapsed_seconds'],
+            delta=1e-5
+        )
+        self.assertIsNone(self._generate_content()[0].profile)
+
+    def test_text_sinks(self):
+        DateColumnField.objects.create(
+            order=4,
+            name='Date',
+            field_type=DateColumnField.DATE,
+            schema=self.schema
+        )
+        csv_rows = list(csv.reader(io.StringIO(''.join(
+            CsvGenerator(self.schema, 25, chunk_size_=4, seed_=3).stream_csv()
+        ))))
+
+        for file_format in (Dataset.TSV, Dataset.JSONL, Dataset.SQL):
+            csv_generator = CsvGenerator(
+                self.schema, 25, chunk_size_=4, seed_=3,
+                file_format_=file_format
+            )
+            self.assertIsNotNone(csv_generator.sink.get_row_function(
+                csv_generator._get_generators()
+            ))
+            content = ''.join(csv_generator.stream_csv())
+            with override_settings(DATASET_ROW_FUNCTIONS_ENABLED=False):
+                self.assertEqual(
+                    ''.join(csv_generator.stream_csv()), content
+                )
+
+            if file_format == Dataset.TSV:
+                rows = [line.split('\t') for line in content.splitlines()]
+            elif file_format == Dataset.JSONL:
+                rows = [csv_rows[0]] + [
+                    list(json.loads(line).values())
+                    for line in content.splitlines()
+                ]
+            else:
+                connection = sqlite3.connect(':memory:')
+                connection.execute(
+                    'CREATE TABLE global_schema '
+                    '(Job TEXT, Integer INTEGER, Text TEXT, Date TEXT)'
+                )
+                connection.executescript(content)
+                rows = [csv_rows[0]] + connection.execute(
+                    'SELECT * FROM global_schema'
+                ).fetchall()
+            self.assertEqual(
+                [[str(value) for value in row] for row in rows], csv_rows
+            )
+
+    def test_unseeded_generation_differs(self):
+        first_generator = CsvGenerator(self.schema, 10)
+        second_generator = CsvGenerator(self.schema, 10)
+
+        self.assertNotEqual(
+            ''.join(first_generator.stream_csv()),
+            ''.join(second_generator.stream_csv())
+        )
+
+    def test_row_function_output_equals_csv_writer(self):
+        PhoneColumnField.objects.create(
+            order=4,
+            name='Phone',
+            field_type=PhoneColumnField.PHONE,
+            schema=self.schema
+        )
+        DateColumnField.objects.create(
+            order=5,
+            name='Date',
+            field_type=DateColumnField.DATE,
+            schema=self.schema
+        )
+
+        for separator, _ in Schema.SEPARATOR_CHOICES:
+            for quote_type, _ in Schema.QUOTE_CHOICES:
+                self.schema.separator = separator
+                self.schema.quote_type = quote_type
+                csv_generator = CsvGenerator(self.schema, 10, seed_=1)
+                generators = csv_generator._get_generators()
+                self.assertIsNotNone(
+                    csv_generator.sink.get_row_function(generators)
+                )
+
+                compiled_csv = ''.join(csv_generator.stream_csv())
+                with override_settings(DATASET_ROW_FUNCTIONS_ENABLED=False):
+                    fallback_csv = ''.join(csv_generator.stream_csv())
+
+                self.assertEqual(compiled_csv, fallback_csv)
+
+    def test_row_function_inlines_columns(self):
+        csv_generator = CsvGenerator(self.schema, 10)
+
+        row_function = csv_generator.sink.get_row_function(
+            csv_generator._get_generators()
+        )
+
+        self.assertIn('integers_0 = rngs[0].integers', row_function.source)
+        self.assertIn('integers_1(0, 10, size=size', row_function.source)
+        self.assertIn('dump_batch_2(size, rngs[2])', row_function.source)
+
+    def _add_pooled_columns(self) -> None:
+        FullNameColumnField.objects.create(
+            order=4,
+            name='Name',
+            field_type=FullNameColumnField.FULLNAME,
+            cardinality=5,
+            schema=self.schema
+        )
+        CompanyColumnField.objects.create(
+            order=5,
+            name='Company',
+            field_type=CompanyColumnField.COMPANY,
+            cardinality=3,
+            schema=self.schema
+        )
+
+    def test_pooled_columns(self):
+        self._add_pooled_columns()
+        FullNameColumnField.objects.create(
+            order=6,
+            name='Other name',
+            field_type=FullNameColumnField.FULLNAME,
+            cardinality=5,
+            schema=self.schema
+        )
+        csv_generator = CsvGenerator(
+            self.schema, 100, chunk_size_=4, seed_=7
+        )
+        generators = csv_generator._get_generators()
+        row_function = csv_generator.sink.get_row_function(generators)
+
+        content = ''.join(csv_generator.stream_csv())
+        with override_settings(DATASET_ROW_FUNCTIONS_ENABLED=False):
+            fallback_content = ''.join(csv_generator.stream_csv())
+        rows = list(csv.DictReader(io.StringIO(content)))
+
+        self.assertIn('pool_3_item', row_function.source)
+        self.assertEqual(content, fallback_content)
+        self.assertEqual(
+            {row['Name'] for row in rows}, set(generators[3].pool.tolist())
+        )
+        # columns of the same type and cardinality have own pools
+        self.assertFalse(
+            {row['Name'] for row in rows}
+            & {row['Other name'] for row in rows}
+        )
+        self.assertLessEqual(len({row['Company'] for row in rows}), 3)
+        self.assertTrue(all(
+            row['Company'].endswith(' and co.') for row in rows
+        ))
+
+    @unittest.skipIf(pa is None, 'pyarrow is not installed')
+    def test_pooled_parquet_columns(self):
+        self._add_pooled_columns()
+        _, content = self._generate_content()
+        _, parquet = self._generate_content(file_format_=Dataset.PARQUET)
+        table = pq.read_table(io.BytesIO(parquet))
+        rows = list(csv.reader(io.StringIO(content.decode('utf8'))))[1:]
+
+        for name in ('Name', 'Company'):
+            self.assertEqual(
+                table.schema.field(name).type,
+                pa.dictionary(pa.int32(), pa.string())
+            )
+        self.assertEqual(
+            [list(row) for row in zip(*table.to_pydict().values())],
+            [[job, int(integer), *values] for job, integer, *values in rows]
+        )
+
+
+class JobQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Create instances before ALL tests of this TestCase"""
+        cls.author = get_user_model().objects.create(
+            username='test',
+            password='test_pwd'
+        )
+        cls.schema = Schema.objects.create(
+            name='global_schema',
+            author=cls.author
+        )
+        JobColumnField.objects.create(
+            order=1,
+            name='Job',
+            field_type=JobColumnField.JOB,
+            schema=cls.schema
+        )
+
+    def setUp(self) -> None:
+        """Use temporary media root for EACH test"""
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_enqueue_dataset(self):
+        dataset = enqueue_dataset(self.schema, 10)
+
+        self.assertEqual(dataset.status, Dataset.PROCESSED)
+        self.assertEqual(dataset.num_rows, 10)
+        self.assertFalse(dataset.file)
+        self.assertEqual(dataset.job.status, DatasetJob.PENDING)
+
+    def test_claim_next_job(self):
+        first_dataset = enqueue_dataset(self.schema, 10)
+        second_dataset = enqueue_dataset(self.schema, 10)
+
+        first_job = claim_next_job('first')
+        second_job = claim_next_job('second')
+
+        self.assertEqual(first_job.dataset, first_dataset)
+        self.assertEqual(first_job.status, DatasetJob.RUNNING)
+        self.assertEqual(first_job.worker, 'first')
+        self.assertEqual(second_job.dataset, second_dataset)
+        self.assertIsNone(claim_next_job('third'))
+
+    def test_run_dataset_workers_once(self):
+        dataset = enqueue_dataset(self.schema, 10)
+
+        call_command('run_dataset_workers', once=True, stdout=io.StringIO())
+
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.status, Dataset.READY)
+        self.assertEqual(dataset.job.status, DatasetJob.DONE)
+        with dataset.file.open('r') as f:
+            self.assertEqual(len(f.readlines()), 11)
+
+    def test_checkpoints_are_throttled(self):
+        dataset = CsvGenerator(self.schema, 25, chunk_size_=4).create_dataset()
+
+        with override_settings(DATASET_PROGRESS_INTERVAL=60), \
+                mock.patch.object(DatasetProgress, 'checkpoint') as checkpoint:
+            CsvGenerator.from_dataset(dataset, chunk_size_=4).fill_dataset(
+                dataset
+            )
+
+        checkpoint.assert_not_called()
+        self.assertEqual(dataset.status, Dataset.READY)
+
+    def test_interrupted_generation_is_resumed(self):
+        with override_settings(DATASET_CACHE_ENABLED=False,
+                               DATASET_PROGRESS_INTERVAL=0):
+            expected = CsvGenerator(
+                self.schema, 25, chunk_size_=4
+            ).generate_dataset()
+            dataset = CsvGenerator(
+                self.schema, 25, chunk_size_=4,
+                entropy_=int(expected.entropy)
+            ).create_dataset()
+            checkpoint = DatasetProgress.checkpoint
+
+            def interrupted_checkpoint(progress, rows_written, offset):
+                checkpoint(progress, rows_written, offset)
+                if rows_written == 12:
+                    raise RuntimeError('Worker died')
+
+            with mock.patch.object(
+                DatasetProgress, 'checkpoint', interrupted_checkpoint
+            ):
+                with self.assertRaises(RuntimeError):
+                    CsvGenerator.from_dataset(
+                        dataset, chunk_size_=4
+                    ).fill_dataset(dataset)
+            dataset.refresh_from_db()
+            self.assertEqual(dataset.checkpoint_rows, 12)
+
+            with mock.patch.object(
+                CsvGenerator, '_write_chunks',
+                side_effect=CsvGenerator._write_chunks, autospec=True
+            ) as write_chunks:
+                CsvGenerator.from_dataset(
+                    dataset, chunk_size_=4
+                ).fill_dataset(dataset)
+
+        self.assertEqual(write_chunks.call_args.args[3:], (12, 13))
+        self.assertEqual(dataset.status, Dataset.READY)
+        self.assertEqual(dataset.rows_written, 25)
+        with dataset.file.open('rb') as f, expected.file.open('rb') as e:
+            self.assertEqual(f.read(), e.read())
+
+    def test_cancel_pending_job(self):
+        dataset = enqueue_dataset(self.schema, 10)
+
+        self.assertTrue(cancel_dataset(dataset))
+        self.assertFalse(cancel_dataset(dataset))
+
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.status, Dataset.CANCELLED)
+        self.assertEqual(dataset.job.status, DatasetJob.CANCELLED)
+        self.assertIsNone(claim_next_job('worker'))
+
+    def test_cancel_running_job(self):
+        dataset = enqueue_dataset(self.schema, 10)
+        job = claim_next_job('worker')
+
+        cancel_dataset(dataset)
+        run_job(job)
+
+        dataset.refresh_from_db()
+        self.assertEqual(job.status, DatasetJob.CANCELLED)
+        self.assertEqual(dataset.status, Dataset.CANCELLED)
+        self.assertFalse(dataset.file)
+        self.assertFalse(os.path.exists(
+            CsvGenerator._get_spool_path(dataset)
+        ))
+
+    def test_cancel_after_last_chunk(self):
+        dataset = enqueue_dataset(self.schema, 10)
+        job = claim_next_job('worker')
+        finish = DatasetProgress.finish
+
+        def cancelled_finish(progress, rows_written, bytes_written):
+            finish(progress, rows_written, bytes_written)
+            cancel_dataset(dataset)
+
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                with mock.patch.object(
+                    DatasetProgress, 'finish', cancelled_finish
+                ):
+                    run_job(job)
+                files = os.listdir(os.path.join(media_root, 'datasets'))
+
+        dataset.refresh_from_db()
+        self.assertEqual(job.status, DatasetJob.CANCELLED)
+        self.assertEqual(dataset.status, Dataset.CANCELLED)
+        self.assertFalse(dataset.file)
+        self.assertEqual(files, [])
+
+    def test_failed_job(self):
+        dataset = enqueue_dataset(self.schema, 10)
+        job = claim_next_job('worker')
+
+        with mock.patch.object(
+            CsvGenerator, '_write_chunks', side_effect=ValueError('Boom')
+        ):
+            with self.assertLogs('datasets.services.job_queue', 'ERROR'):
+                run_job(job)
+
+        dataset.refresh_from_db()
+        self.assertEqual(job.status, DatasetJob.FAILED)
+        self.assertIn('Boom', job.error)
+        self.assertEqual(dataset.status, Dataset.FAILED)
+
+    def test_failed_job_removes_partial_files(self):
+        dataset = enqueue_dataset(self.schema, 10)
+        job = claim_next_job('worker')
+        spool_path = CsvGenerator._get_spool_path(dataset)
+        os.makedirs(os.path.dirname(spool_path), exist_ok=True)
+        for path in (spool_path, f'{spool_path}.part0'):
+            with open(path, 'w') as f:
+                f.write('partial')
+
+        with mock.patch.object(
+            CsvGenerator, 'from_dataset', side_effect=ValueError('Boom')
+        ):
+            with self.assertLogs('datasets.services.job_queue', 'ERROR'):
+                run_job(job)
+
+        self.assertEqual(job.status, DatasetJob.FAILED)
+        self.assertFalse(os.path.exists(spool_path))
+        self.assertFalse(os.path.exists(f'{spool_path}.part0'))
+
+    def test_stale_running_job_is_claimed_again(self):
+        dataset = enqueue_dataset(self.schema, 10)
+        claim_next_job('first')
+        self.assertIsNone(claim_next_job('second'))
+
+        stale_time = timezone.now() - datetime.timedelta(hours=1)
+        DatasetJob.objects.update(updated_at=stale_time)
+        Dataset.objects.update(updated_at=stale_time)
+        job = claim_next_job('second')
+
+        self.assertEqual(job.dataset, dataset)
+        self.assertEqual(job.worker, 'second')
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Create instances before ALL tests of this TestCase"""
+        cls.author = get_user_model().objects.create(
+            username='test',
+            password='test_pwd'
+        )
+        cls.schema = Schema.objects.create(
+            name='global_schema',
+            author=cls.author
+        )
+        JobColumnField.objects.create(
+            order=1,
+            name='Job',
+            field_type=JobColumnField.JOB,
+            schema=cls.schema
+        )
+
+    def setUp(self) -> None:
+        """Use temporary media root for EACH test"""
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    @staticmethod
+    def _get_metric(name: str, **labels) -> float:
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    def test_generation_metrics(self):
+        started = self._get_metric(
+            'datasets_started_total', file_format=Dataset.CSV
+        )
+        finished = self._get_metric(
+            'datasets_finished_total', file_format=Dataset.CSV
+        )
+        rows = self._get_metric(
+            'dataset_rows_generated_total', file_format=Dataset.CSV
+        )
+        durations = self._get_metric(
+            'dataset_generation_duration_seconds_count', schema_width='1-5'
+        )
+
+        enqueue_dataset(self.schema, 20)
+        pending = enqueue_dataset(self.schema, 30)
+        run_job(claim_next_job('worker'))
+        DatasetJob.objects.filter(dataset=pending).update(
+            created_at=timezone.now() - datetime.timedelta(minutes=5)
+        )
+        response = self.client.get('/metrics')
+        content = response.content.decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self._get_metric(
+                'datasets_started_total', file_format=Dataset.CSV
+            ) - started,
+            1
+        )
+        self.assertEqual(
+            self._get_metric(
+                'datasets_finished_total', file_format=Dataset.CSV
+            ) - finished,
+            1
+        )
+        self.assertEqual(
+            self._get_metric(
+                'dataset_rows_generated_total', file_format=Dataset.CSV
+            ) - rows,
+            20
+        )
+        self.assertEqual(
+            self._get_metric(
+                'dataset_generation_duration_seconds_count',
+                schema_width='1-5'
+            ) - durations,
+            1
+        )
+        self.assertIn('dataset_jobs{status="PENDING"} 1.0', content)
+        self.assertIn('dataset_jobs{status="RUNNING"} 0.0', content)
+        age = float(re.search(
+            r'^dataset_oldest_pending_job_age_seconds (\S+)$', content,
+            re.MULTILINE
+        ).group(1))
+        self.assertGreaterEqual(age, 5 * 60)
+        self.assertLess(age, 6 * 60)
+
+        self.client.get('/metrics')
+        self.assertGreaterEqual(
+            self._get_metric(
+                'http_request_duration_seconds_count',
+                view='metrics', method='GET', status='200'
+            ),
+            1
+        )
+
+    def test_schema_width(self):
+        self.assertEqual(get_schema_width(1), '1-5')
+        self.assertEqual(get_schema_width(6), '6-10')
+        self.assertEqual(get_schema_width(50), '21-50')
+        self.assertEqual(get_schema_width(51), '51+')
+
+    def test_failed_plan_is_counted(self):
+        started = self._get_metric(
+            'datasets_started_total', file_format=Dataset.CSV
+        )
+        failed = self._get_metric(
+            'datasets_failed_total', file_format=Dataset.CSV
+        )
+        enqueue_dataset(self.schema, 10)
+
+        with mock.patch(
+            'datasets.services.csv_writer.get_row_plan',
+            side_effect=ValueError('Boom')
+        ):
+            with self.assertLogs('datasets.services.job_queue', 'ERROR'):
+                job = run_job(claim_next_job('worker'))
+
+        self.assertEqual(job.status, DatasetJob.FAILED)
+        self.assertEqual(
+            self._get_metric(
+                'datasets_started_total', file_format=Dataset.CSV
+            ) - started,
+            1
+        )
+        self.assertEqual(
+            self._get_metric(
+                'datasets_failed_total', file_format=Dataset.CSV
+            ) - failed,
+            1
+        )
+
+
+class DatasetCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Create instances before ALL tests of this TestCase"""
+        cls.author = get_user_model().objects.create(
+            username='test',
+            password='test_pwd'
+        )
+        cls.schema = Schema.objects.create(
+            name='global_schema',
+            author=cls.author
+        )
+        # phones have fixed length, so all files have the same size
+        PhoneColumnField.objects.create(
+            order=1,
+            name='Phone',
+            field_type=PhoneColumnField.PHONE,
+            schema=cls.schema
+        )
+
+    def setUp(self) -> None:
+        """Use temporary media root for EACH test"""
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_seeded_dataset_is_cached(self):
+        first_dataset = CsvGenerator(
+            self.schema, 10, seed_=1
+        ).generate_dataset()
+        second_dataset = CsvGenerator(
+            self.schema, 10, seed_=1
+        ).generate_dataset()
+
+        self.assertNotEqual(first_dataset.pk, second_dataset.pk)
+        self.assertEqual(second_dataset.status, Dataset.READY)
+        self.assertEqual(second_dataset.file.name, first_dataset.file.name)
+        self.assertEqual(DatasetCacheEntry.objects.get().hits, 1)
+
+    def test_cached_dataset_is_not_enqueued(self):
+        CsvGenerator(self.schema, 10, seed_=1).generate_dataset()
+
+        dataset = enqueue_dataset(self.schema, 10, 1)
+
+        self.assertEqual(dataset.status, Dataset.READY)
+        self.assertFalse(DatasetJob.objects.exists())
+
+    def test_different_parameters_are_not_cached(self):
+        first_dataset = CsvGenerator(
+            self.schema, 10, seed_=1
+        ).generate_dataset()
+        datasets = [
+            CsvGenerator(self.schema, 11, seed_=1).generate_dataset(),
+            CsvGenerator(self.schema, 10, seed_=2).generate_dataset(),
+            CsvGenerator(self.schema, 10).generate_dataset(),
+        ]
+
+        for dataset in datasets:
+            self.assertNotEqual(dataset.file.name, first_dataset.file.name)
+        self.assertEqual(DatasetCacheEntry.objects.count(), 3)
+
+    def test_sql_datasets_of_schemas_are_cached_separately(self):
+        other_schema = Schema.objects.create(
+            name='other_schema',
+            author=self.author
+        )
+        PhoneColumnField.objects.create(
+            order=1,
+            name='Phone',
+            field_type=PhoneColumnField.PHONE,
+            schema=other_schema
+        )
+        contents = []
+
+        for schema in (self.schema, other_schema):
+            dataset = CsvGenerator(
+                schema, 10, seed_=1, file_format_=Dataset.SQL
+            ).generate_dataset()
+            with dataset.file.open('r') as f:
+                contents.append(f.read())
+
+        self.assertIn('INSERT INTO "global_schema"', contents[0])
+        self.assertIn('INSERT INTO "other_schema"', contents[1])
+        self.assertEqual(DatasetCacheEntry.objects.count(), 2)
+        # the same columns of csv give the same file
+        self.assertEqual(
+            CsvGenerator(self.schema, 10, seed_=1).get_fingerprint(),
+            CsvGenerator(other_schema, 10, seed_=1).get_fingerprint()
+        )
+
+    def test_least_recently_used_entry_is_evicted(self):
+        first_dataset = CsvGenerator(
+            self.schema, 10, seed_=1
+        ).generate_dataset()
+        file_size = first_dataset.file.size
+
+        with override_settings(DATASET_CACHE_MAX_SIZE=file_size * 2):
+            CsvGenerator(self.schema, 10, seed_=2).generate_dataset()
+            CsvGenerator(self.schema, 10, seed_=1).generate_dataset()
+            CsvGenerator(self.schema, 10, seed_=3).generate_dataset()
+
+        evicted = Dataset.objects.get(seed=2)
+
+        self.assertEqual(
+            set(DatasetCacheEntry.objects.values_list('file_name', flat=True)),
+            set(
+                Dataset.objects.filter(seed__in=[1, 3])
+                .values_list('file', flat=True)
+            )
+        )
+        # dataset of evicted entry keeps its file
+        self.assertEqual(evicted.status, Dataset.READY)
+        self.assertTrue(evicted.file.storage.exists(evicted.file.name))
+
+    def test_unreferenced_file_is_deleted_on_eviction(self):
+        dataset = CsvGenerator(self.schema, 10, seed_=1).generate_dataset()
+        storage = dataset.file.storage
+        file_name = dataset.file.name
+        dataset.delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DatasetCache(max_size_=1).evict()
+
+        self.assertFalse(DatasetCacheEntry.objects.exists())
+        self.assertFalse(storage.exists(file_name))
+
+
+class RowPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Create instances before ALL tests of this TestCase"""
+        cls.author = get_user_model().objects.create(
+            username='test',
+            password='test_pwd'
+        )
+        cls.schema = Schema.objects.create(
+            name='global_schema',
+            author=cls.author
+        )
+        cls.column = IntegerColumnField.objects.create(
+            order=1,
+            name='Integer',
+            field_type=IntegerColumnField.RANGED_INT,
+            lower_bound=0,
+            upper_bound=10,
+            schema=cls.schema
+        )
+        DateColumnField.objects.create(
+            order=2,
+            name='Date',
+            field_type=DateColumnField.DATE,
+            schema=cls.schema
+        )
+
+    def test_row_plan(self):
+        plan = get_row_plan(self.schema)
+
+        self.assertEqual(plan.header, ('Integer', 'Date'))
+        self.assertIsInstance(plan.generators[0], IntColumnDataGenerator)
+        self.assertIs(plan.seeded_generators[0], plan.generators[0])
+        self.assertIsNot(plan.seeded_generators[1], plan.generators[1])
+
+    def test_row_plan_is_cached(self):
+        plan = get_row_plan(self.schema)
+
+        # only version of the plan is queried
+        with self.assertNumQueries(1):
+            self.assertIs(get_row_plan(self.schema), plan)
+
+    def test_row_plan_is_invalidated_by_column_change(self):
+        get_row_plan(self.schema)
+
+        self.column.name = 'Renamed'
+        self.column.save()
+
+        self.assertEqual(get_row_plan(self.schema).header, ('Renamed', 'Date'))
+
+    def test_row_plan_is_invalidated_by_column_delete(self):
+        get_row_plan(self.schema)
+
+        self.column.delete()
+
+        self.assertEqual(get_row_plan(self.schema).header, ('Date', ))
+
+    def test_row_plan_is_invalidated_by_another_process(self):
+        get_row_plan(self.schema)
+
+        # change without signals, like in another process
+        SchemaColumn.objects.filter(pk=self.column.pk).update(name='Renamed')
+        Schema.objects.filter(pk=self.schema.pk).update(
+            updated_at=timezone.now()
+        )
+
+        self.assertEqual(get_row_plan(self.schema).header, ('Renamed', 'Date'))
+
+
+class BenchmarkTests(TestCase):
+    @staticmethod
+    def _report(**values) -> dict:
+        return {'results': {
+            name: {
+                'value': value,
+                'unit': '',
+                'higher_is_better': not name.startswith('queries')
+            }
+            for name, value in values.items()
+        }}
+
+    def test_compare_reports(self):
+        baseline = self._report(speed=100, queries=2, removed=1)
+        report = self._report(speed=85, queries=3, added=1)
+
+        regressions = compare_reports(baseline, report, threshold=0.1)
+
+        self.assertEqual(
+            [(name, old, new) for name, old, new, _ in regressions],
+            [('speed', 100, 85), ('queries', 2, 3)]
+        )
+        self.assertEqual(compare_reports(baseline, report, 0.6), [])
+
+    def test_benchmark_datasets_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'report.json')
+            call_command(
+                'benchmark_datasets', rows=[10], generator_size=10,
+                repeat=1, schemas=['narrow'], output=output,
+                stderr=io.StringIO()
+            )
+            with open(output) as f:
+                report = json.load(f)
+
+            call_command(
+                'benchmark_datasets', rows=[10], generator_size=10,
+                repeat=1, schemas=['narrow'], compare=output,
+                threshold=float('inf'), stdout=io.StringIO(),
+                stderr=io.StringIO()
+            )
+
+        # version of the plan and fields of the schema
+        self.assertEqual(
+            report['results']['queries.schema_load.narrow']['value'], 2
+        )
+        self.assertIn('dataset.narrow.10.rows_per_second', report['results'])
+        self.assertIn('generator.TEXT', report['results'])
+        self.assertFalse(Schema.objects.exists())
+
+
+class SchemaBulkApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Create instances before ALL tests of this TestCase"""
+        cls.author = get_user_model().objects.create(
+            username='test',
+            password='test_pwd'
+        )
+        cls.token = Token.objects.create(user=cls.author)
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    @staticmethod
+    def _get_schema_data(name: str, columns_number: int) -> dict:
+        """
+        Return data of schema with columns of every type without
+        parameters, so columns of different tables are inserted.
+        """
+        FIELD_TYPES = ['DATE', 'JOB', 'PHONE', 'EMAIL']
+        columns = []
+        for order in range(1, columns_number + 1):
+            column = {
+                'name': f'column_{order}',
+                'order': order,
+                'field_type': FIELD_TYPES[order % len(FIELD_TYPES)],
+            }
+            columns.append(column)
+        return {'name': name, 'separator': ';', 'columns': columns}
+
+    def _post(self, data):
+        return self.client.post(
+            reverse('datasets:api-schemas'), data, format='json'
+        )
+
+    def test_create_schemas(self):
+        response = self._post([
+            {
+                'name': 'first',
+                'separator': ';',
+                'columns': [
+                    {'name': 'Job', 'order': 2, 'field_type': 'JOB'},
+                    {'name': 'Integer', 'order': 1,
+                     'field_type': 'RANGED_INT',
+                     'lower_bound': 1, 'upper_bound': 5},
+                    {'name': 'Text', 'order': 3, 'field_type': 'TEXT',
+                     'number_of_sentences': 2, 'cardinality': 10},
+                ],
+            },
+            {
+                'name': 'second',
+                'columns': [
+                    {'name': 'Date', 'order': 1, 'field_type': 'DATE'},
+                ],
+            },
+        ])
+        schema = Schema.objects.get(name='first')
+        header, fields = schema.get_header_and_fields()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(item['name'], item['created'], item['columns'])
+             for item in response.json()],
+            [('first', True, 3), ('second', True, 1)]
+        )
+        self.assertEqual(schema.author, self.author)
+        self.assertEqual(schema.separator, ';')
+        self.assertEqual(header, ['Integer', 'Job', 'Text'])
+        self.assertEqual(
+            [type(field) for field in fields],
+            [IntegerColumnField, JobColumnField, TextColumnField]
+        )
+        self.assertEqual((fields[0].lower_bound, fields[0].upper_bound), (1, 5))
+        self.assertEqual(fields[2].number_of_sentences, 2)
+        self.assertEqual(fields[2].cardinality, 10)
+        self.assertIsNone(fields[1].cardinality)
+        self.assertEqual(
+            Schema.objects.get(name='second').ordered_fields[0].field_type,
+            'DATE'
+        )
+
+    def test_columns_are_inserted_in_bulk(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._post([
+                self._get_schema_data(f'schema_{index}', 300)
+                for index in range(3)
+            ])
+        column_inserts = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('INSERT INTO "datasets_')
+            and 'columnfield' in query['sql'].split()[2]
+        ]
+
+        # SchemaColumn rows are batched only by limits of the database
+        self.assertLess(len(queries), 20)
+        self.assertEqual(len(column_inserts), 4)
+        self.assertEqual(SchemaColumn.objects.count(), 900)
+        self.assertEqual(PhoneColumnField.objects.count(), 225)
+
+    def test_schemas_without_returned_rows(self):
+        with mock.patch.object(
+            type(connection.features), 'can_return_rows_from_bulk_insert',
+            False
+        ):
+            response = self._post([
+                self._get_schema_data(f'schema_{index}', 3)
+                for index in range(2)
+            ])
+
+        self.assertEqual(response.status_code, 200)
+        for index in range(2):
+            schema = Schema.objects.get(name=f'schema_{index}')
+            self.assertEqual(
+                schema.get_header_and_fields()[0],
+                ['column_1', 'column_2', 'column_3']
+            )
+        self.assertEqual(SchemaColumn.objects.count(), 6)
+
+    def test_replace_schema(self):
+        self._post([self._get_schema_data('schema', 5)])
+        schema = Schema.objects.get(name='schema')
+        plan = get_row_plan(schema)
+
+        response = self._post([{
+            'name': 'schema',
+            'separator': '|',
+            'columns': [
+                {'name': 'Phone', 'order': 1, 'field_type': 'PHONE'},
+            ],
+        }])
+        replaced = Schema.objects.get(name='schema')
+
+        self.assertEqual(response.json()[0]['created'], False)
+        self.assertEqual(replaced.pk, schema.pk)
+        self.assertEqual(replaced.separator, '|')
+        self.assertGreater(replaced.updated_at, schema.updated_at)
+        self.assertEqual(len(plan.header), 5)
+        self.assertEqual(get_row_plan(replaced).header, ('Phone',))
+        self.assertEqual(SchemaColumn.objects.count(), 1)
+        self.assertEqual(PhoneColumnField.objects.count(), 1)
+
+    def test_schema_of_another_user(self):
+        other = get_user_model().objects.create(username='other')
+        Schema.objects.create(name='taken', author=other)
+
+        response = self._post([self._get_schema_data('taken', 1)])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(SchemaColumn.objects.exists())
+
+    def test_invalid_schemas(self):
+        data = self._get_schema_data('schema', 1)
+        response = self._post([
+            data,
+            data,
+            {'name': 'bounds', 'columns': [
+                {'name': 'Integer', 'order': 1, 'field_type': 'RANGED_INT',
+                 'lower_bound': 1},
+            ]},
+            {'name': 'cardinality', 'columns': [
+                {'name': 'Job', 'order': 1, 'field_type': 'JOB',
+                 'cardinality': 10},
+            ]},
+            {'name': 'orders', 'columns': [
+                {'name': 'First', 'order': 1, 'field_type': 'JOB'},
+                {'name': 'Second', 'order': 1, 'field_type': 'JOB'},
+            ]},
+            {'name': 'names', 'columns': [
+                {'name': 'Job', 'order': 1, 'field_type': 'JOB'},
+                {'name': 'Job', 'order': 2, 'field_type': 'JOB'},
+            ]},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cardinality', response.json()[3]['columns'][0])
+        self.assertEqual(
+            response.json()[4]['columns'],
+            ['Orders in one schema must have distinct values']
+        )
+        self.assertEqual(
+            response.json()[5]['columns'],
+            ['Names in one schema must be different']
+        )
+        self.assertFalse(Schema.objects.exists())
+
+    def test_token_is_required(self):
+        self.client.credentials()
+
+        response = self._post([self._get_schema_data('schema', 1)])
+
+        self.assertEqual(response.status_code, 401)
+
+
+class DatasetBatchApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Create instances before ALL tests of this TestCase"""
+        cls.author = get_user_model().objects.create(
+            username='test',
+            password='test_pwd'
+        )
+        cls.token = Token.objects.create(user=cls.author)
+        cls.schemas = []
+        for name in ('first', 'second'):
+            schema = Schema.objects.create(name=name, author=cls.author)
+            JobColumnField.objects.create(
+                order=1,
+                name='Job',
+                field_type=JobColumnField.JOB,
+                schema=schema
+            )
+            cls.schemas.append(schema)
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def _post(self, data):
+        return self.client.post(
+            reverse('datasets:api-datasets'), data, format='json'
+        )
+
+    def test_enqueue_datasets(self):
+        first, second = self.schemas
+        with CaptureQueriesContext(connection) as queries:
+            response = self._post([
+                {'schema': first.pk, 'num_rows': 10},
+                {'schema': second.pk, 'num_rows': 20,
+                 'file_format': Dataset.JSONL},
+                {'schema': first.pk, 'num_rows': 30, 'seed': 1,
+                 'compression': Dataset.GZIP},
+                {'schema': first.pk, 'num_rows': 40, 'seed': 2},
+            ])
+        results = response.json()
+        datasets = Dataset.objects.in_bulk(
+            [result['dataset'] for result in results]
+        )
+        schema_queries = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "datasets_schema"' in query['sql']
+        ]
+
+        self.assertEqual(response.status_code, 201)
+        # schemas and version of the plan of the seeded schema
+        self.assertEqual(len(schema_queries), 2)
+        self.assertEqual(
+            [
+                (datasets[result['dataset']].schema_id,
+                 datasets[result['dataset']].num_rows)
+                for result in results
+            ],
+            [(first.pk, 10), (second.pk, 20), (first.pk, 30), (first.pk, 40)]
+        )
+        self.assertEqual(datasets[results[1]['dataset']].file_format, 'JSONL')
+        self.assertEqual(datasets[results[2]['dataset']].compression, 'GZIP')
+        self.assertEqual(
+            set(
+                DatasetJob.objects.filter(status=DatasetJob.PENDING)
+                .values_list('pk', 'dataset_id')
+            ),
+            {(result['job'], result['dataset']) for result in results}
+        )
+
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                job = run_job(claim_next_job('worker'))
+                job.dataset.refresh_from_db()
+                self.assertEqual(job.dataset.status, Dataset.READY)
+                self.assertEqual(job.dataset.pk, results[0]['dataset'])
+
+    def test_schema_of_another_user(self):
+        other = get_user_model().objects.create(username='other')
+        schema = Schema.objects.create(name='foreign', author=other)
+
+        response = self._post([
+            {'schema': self.schemas[0].pk, 'num_rows': 10},
+            {'schema': schema.pk, 'num_rows': 10},
+        ])
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_invalid_specs(self):
+        response = self._post([
+            {'schema': self.schemas[0].pk, 'num_rows': 10},
+            {'schema': self.schemas[0].pk, 'num_rows': 10,
+             'compression': Dataset.GZIP, 'compression_level': 99},
+            {'schema': self.schemas[0].pk, 'num_rows': -1},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[0], {})
+        self.assertIn('non_field_errors', response.json()[1])
+        self.assertIn('num_rows', response.json()[2])
+        self.assertFalse(Dataset.objects.exists())
+
+
+class AsyncDatasetViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Create instances before ALL tests of this TestCase"""
+        cls.author = get_user_model().objects.create(
+            username='test',
+            password='test_pwd'
+        )
+        cls.schema = Schema.objects.create(name='first', author=cls.author)
+        JobColumnField.objects.create(
+            order=1,
+            name='Job',
+            field_type=JobColumnField.JOB,
+            schema=cls.schema
+        )
+
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.async_client.force_login(self.author)
+
+    async def _generate(self, **data) -> Dataset:
+        response = await self.async_client.post(
+            reverse('datasets:schema-detail', args=[self.schema.pk]),
+            {'num_rows': 100, **data},
+            headers={'X-Requested-With': 'XMLHttpRequest'}
+        )
+        self.assertEqual(response.status_code, 200)
+        pk = json.loads(response.json()['instance'])[0]['pk']
+        await sync_to_async(run_job)(
+            await sync_to_async(claim_next_job)('worker')
+        )
+        return await Dataset.objects.aget(pk=pk)
+
+    async def test_generate_and_status(self):
+        dataset = await self._generate()
+
+        response = await self.async_client.get(
+            reverse('datasets:dataset-status', args=[dataset.pk])
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], Dataset.READY)
+        self.assertEqual(response.json()['rows_written'], 100)
+        self.assertEqual(
+            response.json()['download_url'],
+            reverse('datasets:dataset-download', args=[dataset.pk])
+        )
+
+    async def test_download(self):
+        dataset = await self._generate()
+
+        response = await self.async_client.get(
+            reverse('datasets:dataset-download', args=[dataset.pk])
+        )
+        content = b''.join([chunk async for chunk in response])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertEqual(int(response['Content-Length']), len(content))
+        self.assertIn('filename="first.csv"', response['Content-Disposition'])
+        self.assertEqual(len(content.decode().splitlines()), 101)
+
+    def test_download_by_wsgi(self):
+        dataset = async_to_sync(self._generate)()
+        self.client.force_login(self.author)
+
+        response = self.client.get(
+            reverse('datasets:dataset-download', args=[dataset.pk])
+        )
+        content = b''.join(response.streaming_content)
+        response.close()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(int(response['Content-Length']), len(content))
+        self.assertIn('filename="first.csv"', response['Content-Disposition'])
+        self.assertEqual(len(content.decode().splitlines()), 101)
+
+    async def test_download_compressed(self):
+        dataset = await self._generate(compression=Dataset.GZIP)
+        url = reverse('datasets:dataset-download', args=[dataset.pk])
+
+        encoded = await self.async_client.get(
+            url, headers={'Accept-Encoding': 'gzip, br'}
+        )
+        archive = await self.async_client.get(url)
+        encoded_content = b''.join([chunk async for chunk in encoded])
+        archive_content = b''.join([chunk async for chunk in archive])
+
+        self.assertEqual(encoded['Content-Encoding'], 'gzip')
+        self.assertIn('filename="first.csv"', encoded['Content-Disposition'])
+        self.assertNotIn('Content-Encoding', archive)
+        self.assertIn(
+            'filename="first.csv.gz"', archive['Content-Disposition']
+        )
+        self.assertIn('Accept-Encoding', archive['Vary'])
+        self.assertEqual(encoded_content, archive_content)
+        self.assertEqual(
+            len(gzip.decompress(encoded_content).splitlines()), 101
+        )
+
+    async def test_dataset_of_another_user(self):
+        other = await get_user_model().objects.acreate(username='other')
+        schema = await Schema.objects.acreate(name='foreign', author=other)
+        dataset = await Dataset.objects.acreate(schema=schema, num_rows=10)
+
+        for name in ('datasets:dataset-status', 'datasets:dataset-download'):
+            response = await self.async_client.get(
+                reverse(name, args=[dataset.pk])
+            )
+            self.assertEqual(response.status_code, 404)
+
+    async def test_login_required(self):
+        await sync_to_async(self.async_client.logout)()
+
+        response = await self.async_client.get(
+            reverse('datasets:dataset-status', args=[1])
+        )
+
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(LIST_PAGE_SIZE=5)
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Create instances before ALL tests of this TestCase"""
+        cls.author = get_user_model().objects.create(
+            username='test',
+            password='test_pwd'
+        )
+        cls.schema = Schema.objects.create(name='first', author=cls.author)
+        JobColumnField.objects.create(
+            order=1,
+            name='Job',
+            field_type=JobColumnField.JOB,
+            schema=cls.schema
+        )
+
+    def setUp(self) -> None:
+        self.client.force_login(self.author)
+
+    def _create_schemas(self, number: int) -> None:
+        start = Schema.objects.count()
+        Schema.objects.bulk_create([
+            Schema(name=f'schema_{index}', author=self.author)
+            for index in range(start, start + number)
+        ])
+
+    def test_pages(self):
+        self._create_schemas(11)
+        # pages must not skip or repeat objects with the same time
+        Schema.objects.update(created_at=timezone.now())
+        expected = list(
+            Schema.objects.order_by('-created_at', '-pk')
+            .values_list('pk', flat=True)
+        )
+
+        pks = []
+        cursor = None
+        for _ in range(3):
+            page = paginate_by_keyset(Schema.objects.all(), cursor, 5)
+            pks.extend(schema.pk for schema in page.object_list)
+            cursor = page.next_cursor
+
+        self.assertEqual(pks, expected)
+        self.assertIsNone(cursor)
+
+    def test_invalid_cursor(self):
+        for cursor in ('invalid', '%%%', 'MjAyMy0wMS0wMQ'):
+            with self.assertRaises(ValueError):
+                paginate_by_keyset(Schema.objects.all(), cursor, 5)
+
+        response = self.client.get(
+            reverse('datasets:schema-list'), {'after': 'invalid'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def _count_queries(self, url: str, **params) -> tuple:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_schema_list(self):
+        url = reverse('datasets:schema-list')
+        self._create_schemas(2)
+        few_queries, response = self._count_queries(url)
+        self.assertEqual(len(response.context['schema_list']), 3)
+        self.assertFalse(response.context['is_paginated'])
+
+        self._create_schemas(20)
+        many_queries, response = self._count_queries(url)
+        page = response.context['page_obj']
+        next_queries, next_response = self._count_queries(
+            url, after=page.next_cursor
+        )
+
+        self.assertEqual(few_queries, many_queries)
+        self.assertEqual(many_queries, next_queries)
+        self.assertEqual(len(response.context['schema_list']), 5)
+        self.assertContains(response, f'?after={page.next_cursor}')
+        self.assertEqual(
+            [schema.pk for schema in next_response.context['schema_list']],
+            list(
+                Schema.objects.order_by('-created_at', '-pk')
+                .values_list('pk', flat=True)[5:10]
+            )
+        )
+
+    def test_dataset_history(self):
+        url = reverse('datasets:schema-detail', args=[self.schema.pk])
+        Dataset.objects.create(schema=self.schema)
+        few_queries, response = self._count_queries(url)
+
+        Dataset.objects.bulk_create(
+            Dataset(schema=self.schema) for _ in range(20)
+        )
+        many_queries, response = self._count_queries(url)
+        page = response.context['datasets_page']
+
+        self.assertEqual(few_queries, many_queries)
+        self.assertEqual(len(page.object_list), 5)
+        self.assertContains(
+            response, 'data-status-url="/', count=len(page.object_list)
+        )
+        self.assertContains(response, f'?after={page.next_cursor}')
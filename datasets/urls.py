@@ -8,10 +8,28 @@ urlpatterns = [
     path('<int:pk>/detail/',
          views.SchemaDetailView.as_view(),
          name='schema-detail'),
+    path('<int:pk>/stream/',
+         views.SchemaStreamView.as_view(),
+         name='schema-stream'),
+    path('dataset/<int:pk>/status/',
+         views.DatasetStatusView.as_view(),
+         name='dataset-status'),
+    path('dataset/<int:pk>/cancel/',
+         views.DatasetCancelView.as_view(),
+         name='dataset-cancel'),
+    path('dataset/<int:pk>/download/',
+         views.DatasetDownloadView.as_view(),
+         name='dataset-download'),
     path('<int:pk>/edit/',
          views.SchemaUpdateView.as_view(),
          name='schema-edit'),
     path('<int:pk>/delete/',
          views.SchemaDeleteView.as_view(),
          name='schema-delete'),
+    path('api/schemas/',
+         views.SchemaBulkApiView.as_view(),
+         name='api-schemas'),
+    path('api/datasets/',
+         views.DatasetBatchApiView.as_view(),
+         name='api-datasets'),
 ]
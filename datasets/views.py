@@ -1,29 +1,113 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.http import (
+    JsonResponse, StreamingHttpResponse, FileResponse, HttpResponse, Http404
+)
 from django.core import serializers
+from django.core.handlers.asgi import ASGIRequest
 from django.views import generic, View
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db import transaction
+from django.conf import settings
+from django.utils.http import content_disposition_header
+from prometheus_client import CONTENT_TYPE_LATEST
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from datasets.forms import (
     SchemaForm, SchemaColumnFormSet, DatasetGeneratorForm
 )
-from datasets.models import Schema
+from datasets.models import Schema, Dataset
+from datasets.serializers import SchemaListSerializer, DatasetSpecSerializer
 from datasets.services.csv_writer import CsvGenerator
+from datasets.services.compression import COMPRESSION_FORMATS
+from datasets.services.sinks import get_sink_class
+from datasets.services.job_queue import (
+    enqueue_dataset, enqueue_datasets, cancel_dataset
+)
+from datasets.services.metrics import generate_metrics
+from datasets.services.pagination import paginate_by_keyset
+from datasets.services.schema_bulk import save_schemas, SchemaOwnershipError
 
 import logging
 logger = logging.getLogger(__name__)
 
+# size of chunks of downloaded files (in bytes)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """
+    LoginRequiredMixin for views with async handlers. Session and user
+    are loaded in a thread, because session and auth backends are sync.
+    """
+    async def dispatch(self, request, *args, **kwargs):
+        is_authenticated = await sync_to_async(
+            lambda: request.user.is_authenticated
+        )()
+        if not is_authenticated:
+            return self.handle_no_permission()
+        return await View.dispatch(self, request, *args, **kwargs)
+
+
+def _get_keyset_page(request, queryset):
+    """
+    Return page of the queryset after cursor from 'after' parameter.
+    """
+    try:
+        return paginate_by_keyset(
+            queryset, request.GET.get('after'), settings.LIST_PAGE_SIZE
+        )
+    except ValueError:
+        raise Http404('Invalid page cursor.')
+
+
+async def _aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'No {queryset.model._meta.object_name} matches.')
+
+
+async def _aiter_file(file, chunk_size: int = DOWNLOAD_CHUNK_SIZE):
+    """
+    Async generator-func for chunks of the file. Only reads of chunks
+    run in threads, so slow clients don't hold threads while they
+    receive the file. The file is closed at the end.
+    """
+    read = sync_to_async(file.read, thread_sensitive=False)
+    try:
+        while True:
+            chunk = await read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await sync_to_async(file.close, thread_sensitive=False)()
+
 
 class SchemaListView(LoginRequiredMixin, generic.ListView):
     """
-    ListView for Schema model.
+    ListView for Schema model. Schemas are paginated by keyset,
+    the newest go first.
     """
     model = Schema
 
     def get_queryset(self):
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.filter(author=self.request.user).only(
+            'name', 'created_at', 'updated_at'
+        )
+
+    def get_paginate_by(self, queryset):
+        return settings.LIST_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, page_size):
+        page = _get_keyset_page(self.request, queryset)
+        return None, page, page.object_list, page.has_next
 
 
 class SchemaCreateOrUpdateView(LoginRequiredMixin):
@@ -113,36 +197,293 @@ class SchemaDeleteView(LoginRequiredMixin, generic.DeleteView):
     success_url = reverse_lazy('datasets:schema-list')
 
 
-class SchemaDetailView(LoginRequiredMixin, View):
+class SchemaDetailView(AsyncLoginRequiredMixin, View):
     """
     DetailView for Schema model. Also implement csv-generator functionality.
+    Handlers are async, submitted generation is enqueued in a thread.
     """
     form_class = DatasetGeneratorForm
     template_name = 'datasets/schema_detail.html'
 
-    def get(self, *args, **kwargs):
+    async def get(self, *args, **kwargs):
+        return await sync_to_async(self._render_detail)()
+
+    def _render_detail(self):
         form = self.form_class()
         schema_pk = self.kwargs['pk']
-        schema = get_object_or_404(
-            Schema.objects.prefetch_related('schemacolumn_set'), pk=schema_pk
+        schema = get_object_or_404(Schema, pk=schema_pk)
+        datasets_page = _get_keyset_page(
+            self.request,
+            schema.dataset_set.only(
+                'schema', 'created_at', 'status', 'file'
+            )
         )
         return render(self.request, self.template_name,
-                      {"form": form, "schema": schema})
+                      {"form": form, "schema": schema,
+                       "datasets_page": datasets_page})
 
-    def post(self, *args, **kwargs):
+    async def post(self, *args, **kwargs):
         request = self.request
         is_ajax = request.META.get('HTTP_X_REQUESTED_WITH') == 'XMLHttpRequest'
         if is_ajax and request.method == "POST":
             form = self.form_class(self.request.POST)
             if form.is_valid():
                 form_data = form.cleaned_data
-                schema_pk = self.kwargs['pk']
-                schema = get_object_or_404(Schema, pk=schema_pk)
-                csv_generator = CsvGenerator(schema, form_data.get('num_rows'))
-                dataset = csv_generator.generate_dataset()
+                schema = await _aget_object_or_404(
+                    Schema.objects.all(), pk=self.kwargs['pk']
+                )
+                dataset = await sync_to_async(enqueue_dataset)(
+                    schema, form_data.get('num_rows'), form_data.get('seed'),
+                    form_data.get('compression'),
+                    form_data.get('compression_level'),
+                    form_data.get('file_format')
+                )
                 ser_instance = serializers.serialize('json', [dataset, ])
                 return JsonResponse({"instance": ser_instance}, status=200)
             else:
                 return JsonResponse({"error": form.errors}, status=400)
 
         return JsonResponse({"error": ""}, status=400)
+
+
+class SchemaStreamView(LoginRequiredMixin, View):
+    """
+    View for streaming csv with dump data, generated on the fly
+    for the schema. Number of rows is taken from 'rows' query parameter,
+    optional seed from 'seed' query parameter.
+    """
+    form_class = DatasetGeneratorForm
+
+    def get(self, *args, **kwargs):
+        form = self.form_class({
+            'num_rows': self.request.GET.get('rows'),
+            'seed': self.request.GET.get('seed'),
+        })
+        if not form.is_valid():
+            return JsonResponse({"error": form.errors}, status=400)
+
+        schema = get_object_or_404(Schema, pk=self.kwargs['pk'])
+        csv_generator = CsvGenerator(
+            schema,
+            form.cleaned_data.get('num_rows'),
+            chunk_size_=settings.DATASET_STREAM_CHUNK_SIZE,
+            seed_=form.cleaned_data.get('seed')
+        )
+        response = StreamingHttpResponse(
+            csv_generator.stream_csv(),
+            content_type='text/csv'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{schema.name}.csv"'
+        )
+        return response
+
+
+class DatasetStatusView(AsyncLoginRequiredMixin, View):
+    """
+    View with JSON status, progress and ETA of the dataset.
+    It's polled by schema detail page, so only needed fields are loaded.
+    Async, so pollers don't hold threads of the server.
+    """
+    async def get(self, *args, **kwargs):
+        dataset = await _aget_object_or_404(
+            Dataset.objects.only(
+                'status', 'file', 'num_rows', 'rows_written', 'bytes_written',
+                'rows_per_second', 'started_at', 'finished_at'
+            ),
+            pk=self.kwargs['pk'],
+            schema__author=self.request.user
+        )
+        download_url = None
+        if dataset.file:
+            download_url = reverse(
+                'datasets:dataset-download', args=[dataset.pk]
+            )
+        return JsonResponse({
+            'id': dataset.pk,
+            'status': dataset.status,
+            'num_rows': dataset.num_rows,
+            'rows_written': dataset.rows_written,
+            'bytes_written': dataset.bytes_written,
+            'rows_per_second': dataset.rows_per_second,
+            'progress': dataset.progress,
+            'eta_seconds': dataset.eta_seconds,
+            'started_at': dataset.started_at,
+            'finished_at': dataset.finished_at,
+            'download_url': download_url,
+        })
+
+
+class DatasetCancelView(LoginRequiredMixin, View):
+    """
+    View for cancelling generation of the dataset.
+    """
+    def post(self, *args, **kwargs):
+        dataset = get_object_or_404(
+            Dataset.objects.only('status'),
+            pk=self.kwargs['pk'],
+            schema__author=self.request.user
+        )
+        if not cancel_dataset(dataset):
+            return JsonResponse(
+                {"error": "Dataset isn't processed anymore."}, status=400
+            )
+        return JsonResponse({"status": Dataset.CANCELLED}, status=200)
+
+
+class DatasetDownloadView(AsyncLoginRequiredMixin, View):
+    """
+    View for downloading generated file of the dataset. Compressed text
+    is served with content encoding, when client accepts it,
+    otherwise as compressed archive. Under ASGI the file is streamed
+    asynchronously, under WSGI it's served by FileResponse, so the server
+    can send it by wsgi.file_wrapper without reading it into memory.
+    """
+    async def get(self, *args, **kwargs):
+        dataset = await _aget_object_or_404(
+            Dataset.objects.select_related('schema').exclude(file=''),
+            pk=self.kwargs['pk'],
+            schema__author=self.request.user,
+            file__isnull=False
+        )
+        sink_class = get_sink_class(dataset.file_format)
+        file_name = f'{dataset.schema.name}{sink_class.extension}'
+        content_type = sink_class.content_type
+        encoding = None
+        if not sink_class.is_binary and \
+                dataset.compression != Dataset.NO_COMPRESSION:
+            extension, encoding, archive_type = COMPRESSION_FORMATS[
+                dataset.compression
+            ]
+            accepted = self.request.META.get('HTTP_ACCEPT_ENCODING', '')
+            accepted = {
+                item.split(';')[0].strip() for item in accepted.split(',')
+            }
+            if encoding not in accepted:
+                encoding = None
+                file_name = f'{file_name}{extension}'
+                content_type = archive_type
+
+        file, size = await sync_to_async(
+            self._open_file, thread_sensitive=False
+        )(dataset)
+        if isinstance(self.request, ASGIRequest):
+            response = StreamingHttpResponse(
+                _aiter_file(file), content_type=content_type
+            )
+            response['Content-Length'] = size
+            response['Content-Disposition'] = content_disposition_header(
+                True, file_name
+            )
+        else:
+            # WSGI would consume async iterator into memory at once
+            response = FileResponse(
+                file, as_attachment=True, filename=file_name,
+                content_type=content_type
+            )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if dataset.compression != Dataset.NO_COMPRESSION \
+                and not sink_class.is_binary:
+            response['Vary'] = 'Accept-Encoding'
+        return response
+
+    @staticmethod
+    def _open_file(dataset) -> tuple:
+        file = dataset.file.open('rb')
+        return file, file.size
+
+
+class MetricsView(View):
+    """
+    View for metrics in Prometheus text format, scraped by monitoring.
+    """
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(
+            generate_metrics(), content_type=CONTENT_TYPE_LATEST
+        )
+
+
+class SchemaBulkApiView(APIView):
+    """
+    Token-authenticated API view for creating or replacing list of schemas
+    with their columns. Existing schemas of the user are found by names,
+    their columns are replaced. Columns of all schemas are inserted
+    by bulk queries in one transaction.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    # max number of schemas in one request
+    max_schemas = 1000
+
+    def post(self, request, *args, **kwargs):
+        serializer = SchemaListSerializer(
+            data=request.data, max_length=self.max_schemas
+        )
+        serializer.is_valid(raise_exception=True)
+        schemas = [
+            serializer.child.build_schema(attrs)
+            for attrs in serializer.validated_data
+        ]
+        try:
+            results = save_schemas(request.user, schemas)
+        except SchemaOwnershipError as exc:
+            return Response(
+                {'detail': str(exc)}, status=status.HTTP_409_CONFLICT
+            )
+
+        return Response([
+            {
+                'id': schema.pk,
+                'name': schema.name,
+                'created': is_created,
+                'columns': len(columns),
+            }
+            for (schema, is_created), (_, columns) in zip(results, schemas)
+        ])
+
+
+class DatasetBatchApiView(APIView):
+    """
+    Token-authenticated API view for enqueuing generation of many datasets
+    of user's schemas at once. Return ids of datasets and their jobs
+    (job is null, if seeded dataset has been taken from cache).
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    # max number of datasets in one request
+    max_datasets = 1000
+
+    def post(self, request, *args, **kwargs):
+        serializer = DatasetSpecSerializer(
+            data=request.data, many=True, allow_empty=False,
+            max_length=self.max_datasets
+        )
+        serializer.is_valid(raise_exception=True)
+        specs = serializer.validated_data
+
+        schema_pks = {spec['schema'] for spec in specs}
+        schemas = Schema.objects.filter(
+            pk__in=schema_pks, author=request.user
+        ).in_bulk()
+        missing = sorted(schema_pks - set(schemas))
+        if missing:
+            return Response(
+                {'detail': f'Schemas not found: {missing}'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        for spec in specs:
+            spec['schema'] = schemas[spec['schema']]
+
+        results = enqueue_datasets(specs)
+        return Response(
+            [
+                {
+                    'dataset': dataset.pk,
+                    'job': job.pk if job is not None else None,
+                    'status': dataset.status,
+                }
+                for dataset, job in results
+            ],
+            status=status.HTTP_201_CREATED
+        )
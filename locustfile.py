@@ -1,40 +1,298 @@
-import time
-from locust import HttpUser, TaskSet, events, task, between
+"""
+Load test of csv-maker: users log in, create their schemas by the API,
+request generation of datasets of different sizes by AJAX, poll status
+of their datasets and download ready files.
+
+Usage (workers must run, so generated datasets become ready):
+    python manage.py run_dataset_workers --workers 2
+    locust -f locustfile.py --host http://localhost:8000 \
+        --headless -u 20 -r 5 -t 5m --seed-manage-py manage.py
+
+Users for the test are created by 'seed_load_test_users' command,
+'--seed-manage-py' runs it before the test on the same host.
+After the test p50/p95/p99 latency and throughput of every endpoint
+are reported, the run fails (exit code 1), if SLO is breached.
+"""
+import json
+import random
+import itertools
+import subprocess
+import sys
+from importlib.util import find_spec
+
+from locust import HttpUser, events, task, between
+from locust.runners import WorkerRunner
+
+# (request name prefix, p95 ms, p99 ms), the first matching prefix is used
+SLOS = [
+    ('/dataset/[id]/status/', 200, 500),
+    ('/dataset/[id]/download/', 3000, 6000),
+    ('/[id]/detail/ [generate', 500, 1000),
+    ('/[id]/detail/', 500, 1000),
+    # password hashing takes most of the time of logging in
+    ('/accounts/login/', 2000, 3000),
+    ('/api-token-auth/', 2000, 3000),
+    ('/', 500, 1000),
+]
+# SLO of other requests (schema creation)
+DEFAULT_SLO = (1000, 3000)
+# max part of failed requests of every endpoint
+MAX_FAILURE_RATIO = 0.01
+
+# {size: (number of rows, weight)}
+DATASET_SIZES = {
+    'small': (1_000, 6),
+    'medium': (10_000, 3),
+    'large': (100_000, 1),
+}
+DATASET_FORMATS = ['CSV', 'CSV', 'JSONL']
+# pyarrow is optional, without it parquet requests are rejected
+if find_spec('pyarrow') is not None:
+    DATASET_FORMATS.append('PARQUET')
+# max number of datasets, which one user waits for at once
+MAX_PENDING_DATASETS = 3
+
+# schemas of every user: {name suffix: columns}
+SCHEMAS = {
+    'narrow': [
+        {'name': 'id', 'order': 1, 'field_type': 'RANGED_INT',
+         'lower_bound': 0, 'upper_bound': 10 ** 6},
+        {'name': 'job', 'order': 2, 'field_type': 'JOB'},
+        {'name': 'phone', 'order': 3, 'field_type': 'PHONE'},
+    ],
+    'wide': [
+        {'name': f'{field_type.lower()}_{order}', 'order': order,
+         'field_type': field_type, **params}
+        for order, (field_type, params) in enumerate([
+            ('RANGED_INT', {'lower_bound': 0, 'upper_bound': 100}),
+            ('FULLNAME', {}), ('EMAIL', {}), ('DATE', {}), ('PHONE', {}),
+            ('COMPANY', {}), ('JOB', {}), ('DOMAIN', {}),
+            ('TEXT', {'number_of_sentences': 3}),
+        ] * 2, start=1)
+    ],
+}
+
+# number of every started locust user in this process
+_user_numbers = itertools.count()
+
+
+@events.init_command_line_parser.add_listener
+def on_init_command_line_parser(parser, **kwargs):
+    parser.add_argument(
+        '--accounts', type=int, default=50,
+        help='Number of seeded accounts, shared by locust users.'
+    )
+    parser.add_argument(
+        '--account-prefix', default='loadtest',
+        help='Prefix of usernames of seeded accounts.'
+    )
+    parser.add_argument(
+        '--account-password', default='loadtest',
+        help='Password of seeded accounts.'
+    )
+    parser.add_argument(
+        '--seed-manage-py', default='',
+        help='Path of manage.py for seeding accounts before the test.'
+    )
 
 
 @events.test_start.add_listener
 def on_test_start(environment, **kwargs):
-    print("Test started!")
-
+    options = environment.parsed_options
+    if isinstance(environment.runner, WorkerRunner) or \
+            not options.seed_manage_py:
+        return
+    subprocess.run(
+        [
+            sys.executable, options.seed_manage_py, 'seed_load_test_users',
+            '--count', str(options.accounts),
+            '--prefix', options.account_prefix,
+            '--password', options.account_password,
+        ],
+        check=True
+    )
 
-@events.test_stop.add_listener
-def on_test_stop(environment, **kwargs):
-    print("Test has ended!")
 
+def _get_slo(name: str) -> tuple:
+    for prefix, p95, p99 in SLOS:
+        if name.startswith(prefix):
+            return p95, p99
+    return DEFAULT_SLO
 
-class SchemaSection(TaskSet):
-    login_token = ''
-    wait_time = between(2, 7)
 
-    @task(10)
-    def schema_list(self):
-        self.client.get("")
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    """
+    Report latency percentiles and throughput of every endpoint
+    and fail the run, if any of them breaches its SLO.
+    """
+    if isinstance(environment.runner, WorkerRunner):
+        return
+    header = (
+        f'{"Method":<7}{"Name":<42}{"Reqs":>7}{"Fails":>7}'
+        f'{"p50":>8}{"p95":>8}{"p99":>8}{"RPS":>8}  SLO'
+    )
+    lines = [header, '-' * len(header)]
+    breaches = []
+    for entry in sorted(
+        environment.stats.entries.values(),
+        key=lambda entry: (entry.name, entry.method)
+    ):
+        if not entry.num_requests:
+            continue
+        p50, p95, p99 = (
+            entry.get_response_time_percentile(percentile)
+            for percentile in (0.5, 0.95, 0.99)
+        )
+        max_p95, max_p99 = _get_slo(entry.name)
+        errors = []
+        if p95 > max_p95:
+            errors.append(f'p95 {p95:.0f} > {max_p95} ms')
+        if p99 > max_p99:
+            errors.append(f'p99 {p99:.0f} > {max_p99} ms')
+        if entry.fail_ratio > MAX_FAILURE_RATIO:
+            errors.append(
+                f'failures {entry.fail_ratio:.1%} > {MAX_FAILURE_RATIO:.0%}'
+            )
+        breaches.extend(f'{entry.method} {entry.name}: {error}'
+                        for error in errors)
+        lines.append(
+            f'{entry.method:<7}{entry.name:<42}{entry.num_requests:>7}'
+            f'{entry.num_failures:>7}{p50:>8.0f}{p95:>8.0f}{p99:>8.0f}'
+            f'{entry.total_rps:>8.2f}  {"FAIL" if errors else "ok"}'
+        )
+    print('\n'.join(lines))
 
-    @task
-    def schema_detail(self):
-        for id in range(20):
-            self.client.get(f"{id + 1}/detail", name="{id}/detail")
-            time.sleep(5)
+    if breaches:
+        print('SLO breached:\n' + '\n'.join(breaches))
+        environment.process_exit_code = 1
+    else:
+        print('All SLOs are met.')
 
 
-class ListSchemaUser(HttpUser):
-    wait_time = between(5, 10)
-    tasks = [SchemaSection]
-    login_token = ''
+class DatasetUser(HttpUser):
+    """
+    User, who generates datasets of own schemas and downloads them.
+    """
+    wait_time = between(1, 3)
 
     def on_start(self):
+        options = self.environment.parsed_options
+        self.number = next(_user_numbers)
+        self.username = (
+            f'{options.account_prefix}_{self.number % options.accounts}'
+        )
+        self.pending_datasets = []
+        self.download_urls = []
+        # token is taken before login, because session authentication
+        # of the API would require csrf token
+        token = self._get_token(options.account_password)
+        self._log_in(options.account_password)
+        self.schema_pks = self._create_schemas(token)
+
+    def _log_in(self, password: str) -> None:
+        """
+        Log in by login form, so session and csrf cookies are set
+        for pages and AJAX requests.
+        """
+        self.client.get('/accounts/login/', name='/accounts/login/')
+        self.client.post(
+            '/accounts/login/',
+            data={
+                'username': self.username,
+                'password': password,
+                'csrfmiddlewaretoken': self.client.cookies.get('csrftoken'),
+            },
+            name='/accounts/login/'
+        )
+
+    def _get_token(self, password: str) -> str:
+        response = self.client.post(
+            '/api-token-auth/',
+            json={'username': self.username, 'password': password}
+        )
+        return response.json()['token']
+
+    def _create_schemas(self, token: str) -> list:
+        """
+        Create (or replace) schemas of this locust user by the API
+        and return their ids.
+        """
+        response = self.client.post(
+            '/api/schemas/',
+            json=[
+                {'name': f'{self.username}_{self.number}_{suffix}',
+                 'columns': columns}
+                for suffix, columns in SCHEMAS.items()
+            ],
+            headers={'Authorization': f'Token {token}'}
+        )
+        return [schema['id'] for schema in response.json()]
+
+    @task(3)
+    def generate_dataset(self):
+        if len(self.pending_datasets) >= MAX_PENDING_DATASETS:
+            self.poll_status()
+            return
+        size = random.choices(
+            list(DATASET_SIZES),
+            weights=[weight for _, weight in DATASET_SIZES.values()]
+        )[0]
+        num_rows, _ = DATASET_SIZES[size]
         response = self.client.post(
-            "api-token-auth/",
-            json={"username": "admin", "password": "admin"}
+            f'/{random.choice(self.schema_pks)}/detail/',
+            data={
+                'num_rows': num_rows,
+                'file_format': random.choice(DATASET_FORMATS),
+            },
+            headers={
+                'X-Requested-With': 'XMLHttpRequest',
+                'X-CSRFToken': self.client.cookies.get('csrftoken', ''),
+            },
+            name=f'/[id]/detail/ [generate {size}]'
+        )
+        if response.ok:
+            instance = json.loads(response.json()['instance'])[0]
+            self.pending_datasets.append(instance['pk'])
+
+    @task(10)
+    def poll_status(self):
+        if not self.pending_datasets:
+            return
+        pk = self.pending_datasets[0]
+        with self.client.get(
+            f'/dataset/{pk}/status/', name='/dataset/[id]/status/',
+            catch_response=True
+        ) as response:
+            if not response.ok:
+                return
+            data = response.json()
+            if data['status'] == 'PROCESSED':
+                # let other datasets of the user be polled as well
+                self.pending_datasets.append(self.pending_datasets.pop(0))
+                return
+            self.pending_datasets.remove(pk)
+            if data['status'] == 'READY':
+                self.download_urls = (
+                    self.download_urls + [data['download_url']]
+                )[-5:]
+            else:
+                response.failure(f'Dataset is {data["status"]}')
+
+    @task(2)
+    def download_dataset(self):
+        if not self.download_urls:
+            return
+        # whole file is read, so latency includes the transfer
+        self.client.get(
+            random.choice(self.download_urls),
+            name='/dataset/[id]/download/'
+        )
+
+    @task(2)
+    def browse_schemas(self):
+        self.client.get('/', name='/')
+        self.client.get(
+            f'/{random.choice(self.schema_pks)}/detail/',
+            name='/[id]/detail/'
         )
-        self.login_token = response.json()['token']